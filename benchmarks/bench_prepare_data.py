@@ -0,0 +1,73 @@
+"""
+Benchmark de prepare_data: filas por segundo con datasets sintéticos de 10^4 a 10^7 partidos.
+
+Ejecutar desde la raíz del proyecto (el esquema se lee de static/datasets/):
+    python benchmarks/bench_prepare_data.py --max-exp 7
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.data_loader import prepare_data
+from utils.schema import get_categories
+
+
+def generar_partidos(n: int, n_equipos: int = 500, seed: int = 0) -> pd.DataFrame:
+    """
+    Genera n partidos sintéticos con los mismos tipos que load_champions_data.
+    """
+    rng = np.random.default_rng(seed)
+    equipos = pd.CategoricalDtype([f"Equipo {i:04d}" for i in range(n_equipos)])
+    estadios = pd.CategoricalDtype([f"Estadio {i:04d}" for i in range(n_equipos)])
+    local = rng.integers(0, n_equipos, n)
+    visitante = (local + rng.integers(1, n_equipos, n)) % n_equipos
+    fases = get_categories('fase')
+
+    return pd.DataFrame({
+        'fecha': pd.Timestamp("2000-01-01") + pd.to_timedelta(rng.integers(0, 9000, n), unit="D"),
+        'equipo_local': pd.Categorical.from_codes(local, dtype=equipos),
+        'equipo_visitante': pd.Categorical.from_codes(visitante, dtype=equipos),
+        'goles_local': rng.poisson(1.6, n).astype(np.int8),
+        'goles_visitante': rng.poisson(1.2, n).astype(np.int8),
+        'fase': pd.Categorical.from_codes(rng.integers(0, len(fases), n), categories=fases),
+        'estadio': pd.Categorical.from_codes(local, dtype=estadios),
+        'temporada': "2000-2001"
+    })
+
+
+def medir(df: pd.DataFrame, repeticiones: int, **opciones) -> float:
+    """
+    Retorna el mejor tiempo (segundos) de varias ejecuciones de prepare_data.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        prepare_data(df, **opciones)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-exp", type=int, default=4)
+    parser.add_argument("--max-exp", type=int, default=7)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'partidos':>12} {'por defecto (filas/s)':>24} {'limpieza completa (filas/s)':>30}")
+    for exp in range(args.min_exp, args.max_exp + 1):
+        n = 10 ** exp
+        df = generar_partidos(n)
+        base = medir(df, args.repeticiones)
+        completo = medir(df, args.repeticiones, clean_duplicates=True, impute_missing=True, unify_consistency=True)
+        print(f"{n:>12,} {n / base:>24,.0f} {n / completo:>30,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_champions_data, get_data_info
+from utils.data_loader import load_champions_data, load_season_views, get_data_info, get_team_match_index, get_validation_report
+from utils.canonical import name_quality_report
+from utils.exports import EXPORT_FORMATS, get_export_path, is_export_ready
 import io
-from pathlib import Path
-import glob
 
 st.set_page_config(page_title="Recolección de Datos", page_icon="💾")
 
@@ -47,49 +47,60 @@ except Exception as e:
 # 2. Exploración de Archivos Raw
 st.header("2. Exploración de Datos Crudos (Raw Data)")
 
-# Detectar dinámicamente todas las temporadas disponibles
-base_path = Path("static/datasets")
-csv_files = sorted(glob.glob(str(base_path / "champions_*.csv")))
-temporadas = [Path(f).stem.replace("champions_", "") for f in csv_files]
-
-# Crear tabs dinámicamente
-tab_names = [t.replace("_", "-") for t in temporadas] + ["Consolidado"]
-tabs = st.tabs(tab_names)
-
-# Mostrar cada temporada en su tab
-for idx, (tab, temporada) in enumerate(zip(tabs[:-1], temporadas)):
-    with tab:
-        try:
-            df_season = load_champions_data(temporada)
-            st.subheader(f"Temporada {temporada.replace('_', '-')}")
-            st.dataframe(df_season.head(10), use_container_width=True)
-            st.caption(f"Total de registros: {len(df_season)}")
-        except Exception as e:
-            st.error(f"Error cargando temporada {temporada}: {str(e)}")
-
-# Tab consolidado
-with tabs[-1]:
+# Una sola carga del consolidado; cada temporada es una vista de sus filas
+try:
+    season_views = load_season_views()
+except Exception as e:
+    st.error(f"Error cargando datos: {str(e)}")
+    season_views = {}
+
+# Solo se renderiza la vista seleccionada (las pestañas de Streamlit renderizan todas)
+vista = st.selectbox(
+    "Vista de datos",
+    options=[t.replace("_", "-") for t in season_views] + ["Consolidado"],
+    help="Temporadas que superaron la validación y el consolidado de todas ellas"
+)
+
+# Mostrar la temporada seleccionada
+if vista != "Consolidado":
+    df_season = season_views[vista.replace("-", "_")]
+    st.subheader(f"Temporada {vista}")
+    st.dataframe(df_season.head(10), use_container_width=True)
+    st.caption(f"Total de registros: {len(df_season)}")
+else:
+    # Vista consolidada
     st.subheader("Dataset Consolidado (Todas las Temporadas)")
     try:
         df_all = load_champions_data("all")
         st.dataframe(df_all.head(10), use_container_width=True)
         st.caption(f"Total de registros consolidados: {len(df_all)}")
         
-        # Descarga del dataset consolidado
-        csv = df_all.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Descargar Dataset Consolidado (CSV)",
-            data=csv,
-            file_name="champions_league_consolidated.csv",
-            mime="text/csv",
+        # Descarga del dataset consolidado: se genera solo al pedirla y una vez por versión
+        formato = st.radio(
+            "Formato de descarga",
+            options=list(EXPORT_FORMATS),
+            format_func=lambda fmt: EXPORT_FORMATS[fmt]["etiqueta"],
+            horizontal=True
         )
+        # El botón de descarga carga el archivo en la memoria de la sesión: solo se
+        # muestra en la ejecución en que se pide y desaparece en la siguiente
+        etiqueta_preparar = "📦 Preparar descarga" if is_export_ready(formato) else "⚙️ Generar descarga"
+        if st.button(etiqueta_preparar):
+            with open(get_export_path(formato), "rb") as archivo_export:
+                st.download_button(
+                    label=f"📥 Descargar Dataset Consolidado ({EXPORT_FORMATS[formato]['etiqueta']})",
+                    data=archivo_export,
+                    file_name=f"champions_league_consolidated{formato}",
+                    mime=EXPORT_FORMATS[formato]["mime"],
+                    on_click="ignore"
+                )
         
         # Información del consolidado
         col_info1, col_info2, col_info3 = st.columns(3)
         with col_info1:
             st.metric("Años Cubiertos", f"{df_all['temporada'].min()} a {df_all['temporada'].max()}")
         with col_info2:
-            st.metric("Equipos Únicos", len(pd.concat([df_all['equipo_local'], df_all['equipo_visitante']]).unique()))
+            st.metric("Equipos Únicos", get_team_match_index().n_teams)
         with col_info3:
             st.metric("Total de Goles", int(df_all['goles_local'].sum() + df_all['goles_visitante'].sum()))
     except Exception as e:
@@ -98,23 +109,59 @@ with tabs[-1]:
 # 3. Reporte de Calidad Inicial
 st.header("3. Reporte de Calidad Inicial")
 
+# Validación de esquema y calidad de cada CSV (el veredicto se guarda por hash del archivo)
+try:
+    validation_df = get_validation_report()
+    st.dataframe(validation_df, use_container_width=True, hide_index=True)
+except Exception as e:
+    st.error(f"Error al validar los archivos: {str(e)}")
+    validation_df = pd.DataFrame(columns=["Archivo", "Estado", "Errores", "Avisos"])
+
+invalidos = validation_df[validation_df["Estado"] == "inválido"]
+con_faltantes = validation_df[validation_df["Avisos"].str.contains("valores faltantes", na=False)]
+con_avisos = validation_df[validation_df["Estado"] == "con avisos"]
+
 col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("### ✅ Puntos Fuertes")
-    st.success("""
-    * **Estructura Consistente:** Todos los archivos comparten las mismas columnas.
-    * **Sin Datos Críticos Faltantes:** Fechas, equipos y goles están completos.
-    * **Formato Estándar:** CSV separado por comas, codificación UTF-8.
-    """)
+    puntos_fuertes = []
+    if invalidos.empty and not validation_df.empty:
+        puntos_fuertes.append(f"* **Estructura Consistente:** Los {len(validation_df)} archivos tienen las columnas y tipos del diccionario de datos.")
+        puntos_fuertes.append("* **Valores Válidos:** Fechas con formato YYYY-MM-DD, goles enteros no negativos y fases permitidas.")
+    if con_faltantes.empty and not validation_df.empty:
+        puntos_fuertes.append("* **Sin Datos Críticos Faltantes:** Fechas, equipos y goles están completos.")
+    puntos_fuertes.append("* **Formato Estándar:** CSV separado por comas, codificación UTF-8.")
+    st.success("\n".join(puntos_fuertes))
+    
+    if not invalidos.empty:
+        st.error(f"**{len(invalidos)} archivo(s) no superaron la validación** y se excluyen del análisis: "
+                 f"{', '.join(invalidos['Archivo'])}")
 
 with col2:
     st.markdown("### ⚠️ Puntos de Atención")
     st.warning("""
-    * **Nombres de Equipos:** Posibles inconsistencias (ej. "Bayern Munich" vs "Bayern München").
+    * **Nombres de Equipos y Estadios:** Variantes del mismo nombre (ej. "PSG" vs "Paris Saint-Germain"); se unifican en la limpieza (ver detalle abajo).
     * **Fechas:** Necesitan conversión a formato datetime para análisis temporal.
     * **Fases:** Requieren ordenamiento lógico (Grupos -> Final) y no alfabético.
     """)
+    
+    if not con_avisos.empty:
+        st.warning("\n".join(f"* **{row.Archivo}:** {row.Avisos}" for row in con_avisos.itertuples()))
+
+# Variantes de nombres de equipos y estadios (se calcula sobre los nombres distintos, no sobre las filas)
+with st.expander("🔤 Variantes de nombres de equipos y estadios"):
+    try:
+        variantes, posibles_duplicados = name_quality_report(load_champions_data("all"))
+        st.markdown("**Variantes unificadas** al activar *Unificar Consistencia* (tabla `alias_nombres.json` o clave normalizada):")
+        st.dataframe(variantes, use_container_width=True, hide_index=True)
+        if posibles_duplicados.empty:
+            st.success("✅ No quedan nombres similares sin resolver.")
+        else:
+            st.markdown("**Posibles duplicados sin resolver** (candidatos para agregar a la tabla de alias):")
+            st.dataframe(posibles_duplicados, use_container_width=True, hide_index=True)
+    except Exception as e:
+        st.error(f"Error al analizar nombres: {str(e)}")
 
 # 4. Diccionario de Datos
 st.header("4. Diccionario de Datos")
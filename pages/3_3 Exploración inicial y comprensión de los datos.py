@@ -1,7 +1,14 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from utils.data_loader import load_champions_data, prepare_data, get_team_stats
+from utils.data_loader import (
+    load_champions_data,
+    get_dataset_summary,
+    get_dataset_team_stats,
+    get_team_match_index
+)
+from utils.aggregates import get_match_rollup, get_stadium_rollup
+from utils.head_to_head import get_head_to_head_index
+from utils.query import col, scan
 from utils.visualizations import (
     create_goals_distribution,
     create_goals_by_phase,
@@ -22,11 +29,15 @@ En esta fase utilizamos visualizaciones interactivas para entender la estructura
 patrones y relaciones en los datos antes de proceder al modelado.
 """)
 
-# Cargar y preparar datos
+# Columnas del resumen estadístico (las numéricas y de fecha de prepare_data)
+COLUMNAS_DESCRIBE = ['fecha', 'goles_local', 'goles_visitante', 'total_goles', 'diferencia_goles', 'año', 'mes']
+
+# Cargar datos (los resultados por temporada se piden al motor de consultas)
 try:
     df_raw = load_champions_data("all")
-    df = prepare_data(df_raw)
-    stats_df = get_team_stats(df)
+    match_rollup = get_match_rollup()
+    stadium_rollup = get_stadium_rollup()
+    temporadas = scan().group_by('temporada').agg(partidos=('temporada', 'size')).collect()['temporada'].tolist()
 except Exception as e:
     st.error(f"Error al cargar datos: {str(e)}")
     st.stop()
@@ -35,26 +46,35 @@ except Exception as e:
 st.sidebar.header("Filtros de Análisis")
 selected_season = st.sidebar.multiselect(
     "Seleccionar Temporadas",
-    options=df['temporada'].unique(),
-    default=df['temporada'].unique()
+    options=temporadas,
+    default=temporadas
 )
 
+# Solo se leen las temporadas seleccionadas y las columnas del resumen
+consulta_describe = scan().select(*COLUMNAS_DESCRIBE)
 if selected_season:
-    df_filtered = df[df['temporada'].isin(selected_season)]
+    consulta_describe = consulta_describe.filter(col('temporada').isin(selected_season))
+    match_filtered = match_rollup[match_rollup['temporada'].isin(selected_season)]
+    stadium_filtered = stadium_rollup[stadium_rollup['temporada'].isin(selected_season)]
 else:
-    df_filtered = df
+    match_filtered = match_rollup
+    stadium_filtered = stadium_rollup
+
+# Estadísticas combinadas a partir de los agregados parciales de cada temporada
+stats_df = get_dataset_team_stats(selected_season)
+summary = get_dataset_summary(selected_season)
 
 # 1. Estadísticas Descriptivas
 st.header("1. Resumen Estadístico")
 
 col1, col2, col3, col4 = st.columns(4)
-col1.metric("Total Partidos", len(df_filtered))
-col2.metric("Total Goles", df_filtered['total_goles'].sum())
-col3.metric("Promedio Goles/Partido", round(df_filtered['total_goles'].mean(), 2))
-col4.metric("Equipos Únicos", len(pd.concat([df_filtered['equipo_local'], df_filtered['equipo_visitante']]).unique()))
+col1.metric("Total Partidos", summary.partidos)
+col2.metric("Total Goles", summary.goles)
+col3.metric("Promedio Goles/Partido", round(summary.promedio_goles, 2))
+col4.metric("Equipos Únicos", len(stats_df))
 
 with st.expander("Ver Estadísticas Detalladas"):
-    st.dataframe(df_filtered.describe(), use_container_width=True)
+    st.dataframe(consulta_describe.collect().describe(), use_container_width=True)
 
 # 2. Análisis de Goles
 st.header("2. Análisis de Goles")
@@ -62,35 +82,59 @@ st.header("2. Análisis de Goles")
 col_g1, col_g2 = st.columns(2)
 
 with col_g1:
-    st.plotly_chart(create_goals_distribution(df_filtered), use_container_width=True)
+    st.plotly_chart(create_goals_distribution(summary), use_container_width=True)
 
 with col_g2:
-    st.plotly_chart(create_goals_by_phase(df_filtered), use_container_width=True)
+    st.plotly_chart(create_goals_by_phase(match_filtered), use_container_width=True)
 
-st.plotly_chart(create_temporal_evolution(df_filtered), use_container_width=True)
+st.plotly_chart(create_temporal_evolution(match_filtered), use_container_width=True)
 
 # 3. Análisis de Equipos
 st.header("3. Rendimiento de Equipos")
 
 st.plotly_chart(create_top_teams_chart(stats_df), use_container_width=True)
 
+# Consulta por equipo usando el índice equipo -> partidos (sin recorrer todo el dataset)
+team_index = get_team_match_index()
+col_e1, col_e2 = st.columns(2)
+with col_e1:
+    equipo = st.selectbox("Consultar equipo", options=stats_df.index)
+with col_e2:
+    rival = st.selectbox("Enfrentamientos directos contra", options=["(Ninguno)"] + [e for e in stats_df.index if e != equipo])
+
+columnas_partido = ['fecha', 'temporada', 'fase', 'equipo_local', 'goles_local', 'goles_visitante', 'equipo_visitante']
+if rival == "(Ninguno)":
+    st.caption(f"Últimos 5 partidos de {equipo}")
+    st.dataframe(df_raw.iloc[team_index.last_n(equipo, 5)][columnas_partido], use_container_width=True, hide_index=True)
+else:
+    # Balance precalculado de la pareja (sumas acumuladas del índice de enfrentamientos directos)
+    h2h_index = get_head_to_head_index()
+    balance = h2h_index.summary(equipo, rival)
+    col_h1, col_h2, col_h3, col_h4 = st.columns(4)
+    col_h1.metric("Enfrentamientos", balance['partidos'])
+    col_h2.metric(f"Victorias {equipo}", balance['victorias'])
+    col_h3.metric("Empates", balance['empates'])
+    col_h4.metric(f"Victorias {rival}", balance['derrotas'])
+    st.caption(f"Historial {equipo} vs {rival} (goles: {balance['goles_favor']} - {balance['goles_contra']})")
+    st.dataframe(df_raw.iloc[h2h_index.matches(equipo, rival)][columnas_partido], use_container_width=True, hide_index=True)
+
 # 4. Análisis de Resultados y Correlaciones
 st.header("4. Factores de Influencia")
 
 col_f1, col_f2 = st.columns(2)
 
 with col_f1:
-    st.plotly_chart(create_result_distribution(df_filtered), use_container_width=True)
+    st.plotly_chart(create_result_distribution(match_filtered), use_container_width=True)
     st.caption("Distribución de resultados (Local vs Visitante)")
 
 with col_f2:
-    st.plotly_chart(create_correlation_heatmap(df_filtered), use_container_width=True)
+    st.plotly_chart(create_correlation_heatmap(summary), use_container_width=True)
     st.caption("Correlación entre variables numéricas")
 
 # 5. Análisis de Estadios
 st.header("5. Análisis de Estadios")
-st.plotly_chart(create_stadium_analysis(df_filtered), use_container_width=True)
+st.plotly_chart(create_stadium_analysis(stadium_filtered), use_container_width=True)
 
 # 6. Comparativa por Temporada
 st.header("6. Comparativa por Temporada")
-st.plotly_chart(create_goals_by_season(df), use_container_width=True)
+st.plotly_chart(create_goals_by_season(match_rollup), use_container_width=True)
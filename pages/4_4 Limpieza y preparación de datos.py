@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.data_loader import load_champions_data, prepare_data, sidebar_reload_button
+from utils.data_loader import get_dataset_version, load_champions_data, sidebar_reload_button
+from utils.pipeline import CleaningPipeline
+from utils.profiler import get_dataset_profile
+from utils.schema import memory_report
 
 st.set_page_config(page_title="Limpieza y Preparación", page_icon="🧹")
 
@@ -12,8 +15,9 @@ En esta etapa transformamos los datos crudos en un formato adecuado para el aná
 Realizamos limpieza, conversión de tipos y creación de nuevas variables (Feature Engineering).
 """)
 
-# Cargar datos crudos
+# Cargar datos crudos y su perfil (una sola pasada, calculado una vez por versión del dataset)
 df_raw = load_champions_data("all")
+profile = get_dataset_profile()
 
 # Botón de recarga en sidebar
 sidebar_reload_button()
@@ -30,7 +34,7 @@ with col_conf2:
     impute_missing = st.checkbox("Imputar Valores Faltantes", value=True, help="Rellena nulos con Media (numéricos) o Moda (categóricos)")
 
 with col_conf3:
-    unify_consistency = st.checkbox("Unificar Consistencia", value=True, help="Limpia espacios y estandariza textos")
+    unify_consistency = st.checkbox("Unificar Consistencia", value=True, help="Limpia espacios y unifica nombres de equipos y estadios (tabla de alias)")
 
 # 2. Diagnóstico Inicial
 st.header("2. Diagnóstico Inicial (Datos Crudos)")
@@ -39,7 +43,7 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Valores Faltantes")
-    null_counts = df_raw.isnull().sum()
+    null_counts = profile.null_counts
     if null_counts.sum() == 0:
         st.success("✅ No se detectaron valores nulos.")
     else:
@@ -48,19 +52,23 @@ with col1:
 
 with col2:
     st.subheader("Duplicados")
-    duplicates = df_raw.duplicated().sum()
+    duplicates = profile.duplicados
     if duplicates == 0:
         st.success("✅ No hay filas duplicadas.")
     else:
         st.warning(f"⚠️ Se encontraron {duplicates} filas duplicadas.")
 
-# Aplicar transformaciones con opciones seleccionadas
-df_processed = prepare_data(
-    df_raw, 
+with st.expander("Ver perfil por columna"):
+    st.dataframe(profile.columns, use_container_width=True, hide_index=True)
+
+# Aplicar transformaciones con opciones seleccionadas (duplicados e imputación desde el perfil).
+# Cada paso queda en caché: al cambiar una opción solo se recalculan ese paso y los siguientes
+pipeline = CleaningPipeline(
     clean_duplicates=clean_duplicates, 
     impute_missing=impute_missing, 
     unify_consistency=unify_consistency
 )
+df_processed = pipeline.run_cached(df_raw, key=get_dataset_version(), profile=profile)
 
 # 3. Resultados de la Limpieza
 st.header("3. Resultados de la Limpieza")
@@ -80,6 +88,12 @@ with col_res2:
     
     if impute_missing and null_counts.sum() > 0:
         st.success("✅ Se imputaron los valores faltantes.")
+        with st.expander("Ver valores de imputación ajustados"):
+            st.dataframe(
+                pd.DataFrame({"Columna": list(pipeline.fill_values), "Valor": [str(v) for v in pipeline.fill_values.values()]}),
+                use_container_width=True,
+                hide_index=True
+            )
 
 # 4. Pipeline de Transformación
 st.header("4. Pipeline de Transformación (Feature Engineering)")
@@ -118,11 +132,28 @@ st.plotly_chart(fig, use_container_width=True)
 # 6. Exportación y Metadatos
 st.header("6. Metadatos Finales")
 
+# Comparativa de memoria con tipos compactos (esquema de diccionario_datos.json)
+reporte_memoria = memory_report(df_processed)
+memoria_antes = reporte_memoria["Memoria antes (KB)"].sum()
+memoria_despues = reporte_memoria["Memoria después (KB)"].sum()
+
 st.success(f"""
 El dataset está listo para el modelado.
 * **Dimensiones:** {df_processed.shape[0]} filas x {df_processed.shape[1]} columnas
-* **Memoria:** {df_processed.memory_usage(deep=True).sum() / 1024:.2f} KB
+* **Memoria:** {memoria_despues:.2f} KB
 """)
 
 if st.checkbox("Ver tipos de datos finales"):
-    st.dataframe(df_processed.dtypes.astype(str), use_container_width=True)
\ No newline at end of file
+    st.dataframe(df_processed.dtypes.astype(str), use_container_width=True)
+
+col_mem1, col_mem2 = st.columns(2)
+col_mem1.metric("Memoria con tipos por defecto", f"{memoria_antes:.2f} KB")
+col_mem2.metric(
+    "Memoria con tipos compactos",
+    f"{memoria_despues:.2f} KB",
+    delta=f"{(memoria_despues - memoria_antes) / memoria_antes * 100:.1f}%",
+    delta_color="inverse"
+)
+
+with st.expander("Ver memoria por columna"):
+    st.dataframe(reporte_memoria, use_container_width=True, hide_index=True)
\ No newline at end of file
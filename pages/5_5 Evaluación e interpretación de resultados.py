@@ -3,7 +3,12 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_loader import load_champions_data, prepare_data
+from utils.head_to_head import get_head_to_head_features
+from utils.model import DEFAULT_FEATURES, get_model_features, get_outcome_model
+from utils.query import scan
+from utils.ratings import get_rating_features
+from utils.scoreline import get_scoreline_model
+from utils.visualizations import create_confusion_matrix, create_scoreline_heatmap
 
 st.set_page_config(page_title="Evaluación de Resultados", page_icon="📊")
 
@@ -14,9 +19,9 @@ En esta etapa construimos un modelo predictivo para validar si los datos contien
 patrones suficientes para anticipar el resultado de un partido.
 """)
 
-# Cargar y preparar datos
-df_raw = load_champions_data("all")
-df = prepare_data(df_raw)
+# Conteos por resultado y por fase (el motor de consultas solo lee fase y goles)
+conteos_resultado = scan().group_by('resultado').agg(count=('resultado', 'size')).collect()
+fase_resultado_grouped = scan().group_by('fase', 'resultado').agg(count=('resultado', 'size')).collect()
 
 # 1. Preparación para Modelado
 st.header("1. Configuración del Modelo")
@@ -25,19 +30,19 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("Selección de Features")
-    features = ['goles_local', 'goles_visitante', 'fase'] # Features base
-    # Nota: En un caso real, no usaríamos goles del partido para predecir el resultado del mismo partido (data leakage).
-    # Para este ejercicio académico, simularemos predecir el resultado basado en estadísticas.
+    # Solo información previa al partido: los goles del propio partido serían fuga de información
+    st.write(list(DEFAULT_FEATURES))
     
     st.info("""
     **Nota Metodológica:**
-    Para este ejercicio demostrativo, utilizaremos un modelo de clasificación Random Forest.
+    Utilizamos una regresión logística multinomial entrenada con las temporadas anteriores
+    y evaluada con la última temporada (validación temporal).
     El objetivo es predecir: **Victoria Local, Empate o Victoria Visitante**.
     """)
 
 # Análisis descriptivo
-resultado_counts = df['resultado'].value_counts()
-total_partidos = len(df)
+resultado_counts = conteos_resultado.set_index('resultado')['count'].sort_values(ascending=False)
+total_partidos = int(resultado_counts.sum())
 
 with col2:
     st.metric("Total de Partidos", total_partidos)
@@ -73,12 +78,17 @@ for idx, (resultado, count) in enumerate(resultado_counts.items()):
 # 3. Análisis por Fase del Torneo
 st.header("3. Análisis por Fase del Torneo")
 
-fase_resultado = pd.crosstab(df['fase'], df['resultado'], margins=True)
+fase_resultado = pd.crosstab(
+    fase_resultado_grouped['fase'],
+    fase_resultado_grouped['resultado'],
+    values=fase_resultado_grouped['count'],
+    aggfunc='sum',
+    margins=True
+).fillna(0).astype(int)
 st.subheader("Tabla Cruzada: Fase vs Resultado")
 st.dataframe(fase_resultado, use_container_width=True)
 
 # Gráfico por fases
-fase_resultado_grouped = df.groupby(['fase', 'resultado']).size().reset_index(name='count')
 fig_fase = px.bar(
     fase_resultado_grouped,
     x='fase',
@@ -90,18 +100,111 @@ fig_fase = px.bar(
 )
 st.plotly_chart(fig_fase, use_container_width=True)
 
+# Features de rating: diferencia de Elo entre local y visitante antes de cada partido
+st.subheader("Resultado según la Diferencia de Rating Elo Previa")
+
+elo_features = get_rating_features()
+resultados = scan().select('resultado').collect()['resultado']
+tramos_elo = pd.cut(
+    elo_features['elo_diferencia'],
+    bins=[-np.inf, -100, -25, 25, 100, np.inf],
+    labels=['Visitante muy superior', 'Visitante superior', 'Parejos', 'Local superior', 'Local muy superior']
+)
+elo_resultado = pd.crosstab(tramos_elo, resultados, normalize='index').mul(100).round(1)
+elo_resultado.index.name = 'Diferencia Elo (local - visitante)'
+st.dataframe(elo_resultado, use_container_width=True)
+st.caption("Porcentaje de cada resultado por tramo; el rating solo usa partidos de fechas anteriores.")
+
+# Features de historial directo: balance previo de la pareja desde el punto de vista del local
+st.subheader("Resultado según el Historial de Enfrentamientos Directos")
+
+h2h_features = get_head_to_head_features()
+balance_h2h = h2h_features['h2h_victorias'] - h2h_features['h2h_derrotas']
+tramos_h2h = pd.Series(
+    np.select(
+        [h2h_features['h2h_partidos'] == 0, balance_h2h > 0, balance_h2h < 0],
+        ['Sin precedentes', 'Local con ventaja', 'Visitante con ventaja'],
+        default='Historial parejo'
+    ),
+    index=h2h_features.index
+)
+h2h_resultado = pd.crosstab(tramos_h2h, resultados, normalize='index').mul(100).round(1)
+h2h_resultado.index.name = 'Historial directo previo'
+st.dataframe(h2h_resultado, use_container_width=True)
+st.caption("Porcentaje de cada resultado según el balance de enfrentamientos anteriores a la fecha del partido.")
+
+# 4. Modelo Predictivo: entrenado con las temporadas anteriores y evaluado con la última
+st.header("4. Modelo Predictivo")
+
+objetivo = scan().select('temporada', 'resultado').collect()
+temporadas_modelo = sorted(objetivo['temporada'].dropna().unique())
+temporada_test = temporadas_modelo[-1]
+modelo = get_outcome_model(tuple(temporadas_modelo[:-1]))
+
+es_test = (objetivo['temporada'] == temporada_test).to_numpy() & objetivo['resultado'].notna().to_numpy()
+X_test = get_model_features().loc[es_test]
+y_test = objetivo.loc[es_test, 'resultado']
+prediccion = modelo.predict(X_test)
+probabilidades = modelo.predict_proba(X_test)
+
+clases = modelo.classes
+codigos_real = pd.Categorical(y_test, categories=clases).codes
+codigos_pred = pd.Categorical(prediccion, categories=clases).codes
+matriz = np.bincount(codigos_real * len(clases) + codigos_pred, minlength=len(clases) ** 2).reshape(len(clases), len(clases))
+precision = float(np.trace(matriz) / matriz.sum())
+precision_base = float((y_test == 'Victoria Local').mean())
+log_loss = float(-np.log(probabilidades.to_numpy()[np.arange(len(codigos_real)), codigos_real]).mean())
+
+col_m1, col_m2, col_m3 = st.columns(3)
+col_m1.metric(f"Precisión ({temporada_test})", f"{precision:.1%}")
+col_m2.metric("Línea base (siempre local)", f"{precision_base:.1%}")
+col_m3.metric("Log-loss", f"{log_loss:.3f}")
+
+col_c1, col_c2 = st.columns([3, 2])
+with col_c1:
+    st.plotly_chart(create_confusion_matrix(matriz, clases), use_container_width=True)
+with col_c2:
+    st.subheader("Coeficientes")
+    st.dataframe(modelo.coefficients().round(3), use_container_width=True)
+    st.caption("Pesos sobre features estandarizadas: un valor positivo favorece ese resultado.")
+
+# Probabilidades de marcador (modelo de Poisson con corrección Dixon-Coles)
+st.subheader("Probabilidades de Marcador")
+
+modelo_goles = get_scoreline_model()
+fuerzas = modelo_goles.parameters()
+col_p1, col_p2 = st.columns(2)
+with col_p1:
+    local = st.selectbox("Equipo local", options=fuerzas.index)
+with col_p2:
+    visitante = st.selectbox("Equipo visitante", options=[e for e in fuerzas.index if e != local])
+
+pronostico = modelo_goles.outcome_probabilities([local], [visitante]).iloc[0]
+col_q1, col_q2, col_q3, col_q4 = st.columns(4)
+col_q1.metric("Victoria Local", f"{pronostico['Victoria Local']:.1%}")
+col_q2.metric("Empate", f"{pronostico['Empate']:.1%}")
+col_q3.metric("Victoria Visitante", f"{pronostico['Victoria Visitante']:.1%}")
+col_q4.metric("Más de 2.5 goles", f"{pronostico['más de 2.5']:.1%}")
+
+st.plotly_chart(
+    create_scoreline_heatmap(modelo_goles.score_matrix([local], [visitante])[0], local, visitante),
+    use_container_width=True
+)
+st.caption(
+    f"Goles esperados: {pronostico['goles_esperados_local']:.2f} - {pronostico['goles_esperados_visitante']:.2f}. "
+    f"Marcador más probable: {pronostico['marcador_probable']} ({pronostico['prob_marcador']:.1%})."
+)
+
 st.info("""
 **Interpretación:**
-Este análisis explorador evalúa cómo se distribuyen los resultados en diferentes fases.
-Una estrategia de modelado futuro podría incluir:
-* Datos históricos de rendimiento de equipos
-* Estadísticas previas de goles
-* Historial de enfrentamientos directos
+El modelo usa solo información previa a cada partido: rating Elo, forma reciente (puntos y goles),
+historial de enfrentamientos directos y fase del torneo. Próximas mejoras podrían incluir:
+* Más temporadas (pocas parejas de equipos tienen precedentes directos)
 * Factores contextuales (lesiones, descanso entre partidos)
 """)
 
-# 3. Interpretación de Negocio
-st.header("3. Interpretación para el Negocio")
+# 5. Interpretación de Negocio
+st.header("5. Interpretación para el Negocio")
 
 st.markdown("""
 ### 💡 Hallazgos Clave
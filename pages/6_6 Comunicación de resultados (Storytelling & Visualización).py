@@ -2,7 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils.data_loader import load_champions_data, prepare_data, get_team_stats
+from utils.data_loader import get_dataset_team_stats
+from utils.form import DEFAULT_FORM_WINDOW, get_current_form
+from utils.query import scan
+from utils.ratings import get_elo_ratings
+from utils.simulation import DEFAULT_SIMULATIONS, get_knockout_probabilities
 
 st.set_page_config(page_title="Comunicación de Resultados", page_icon="📢", layout="wide")
 
@@ -13,10 +17,14 @@ En esta etapa final, sintetizamos los hallazgos en un dashboard ejecutivo y cont
 detrás de los datos para facilitar la toma de decisiones.
 """)
 
-# Cargar datos
-df_raw = load_champions_data("all")
-df = prepare_data(df_raw)
-stats = get_team_stats(df)
+# Cargar datos: totales de goles en una sola consulta (solo lee las columnas de goles)
+totales = scan().agg(
+    total_goles=('total_goles', 'sum'),
+    promedio_goles=('total_goles', 'mean'),
+    goles_local=('goles_local', 'sum'),
+    goles_visitante=('goles_visitante', 'sum')
+).collect()
+stats = get_dataset_team_stats()
 
 # 1. Dashboard Ejecutivo
 st.header("1. Dashboard Ejecutivo")
@@ -24,8 +32,8 @@ st.header("1. Dashboard Ejecutivo")
 # KPIs Principales
 col1, col2, col3, col4 = st.columns(4)
 
-total_goles = df['total_goles'].sum()
-promedio_goles = df['total_goles'].mean()
+total_goles = totales.at[0, 'total_goles']
+promedio_goles = totales.at[0, 'promedio_goles']
 equipo_mas_goleador = stats['goles_favor'].idxmax()
 goles_equipo_top = stats['goles_favor'].max()
 
@@ -50,6 +58,71 @@ fig = px.bar(
 )
 st.plotly_chart(fig, use_container_width=True)
 
+# Jerarquía según el rating Elo (partidos en orden de fecha, con ventaja de localía)
+st.subheader("Jerarquía de Clubes: Rating Elo")
+
+elo = get_elo_ratings()
+top_elo = elo.table().head(10)
+
+col_elo1, col_elo2 = st.columns([1, 2])
+
+with col_elo1:
+    st.dataframe(top_elo.round({'rating': 0}).astype({'rating': int}), use_container_width=True)
+
+with col_elo2:
+    fig_elo = px.line(
+        elo.history(top_elo.index[:5]),
+        x='fecha',
+        y='rating',
+        color='equipo',
+        line_shape='hv',
+        title='Evolución del Rating Elo (Top 5 actual)',
+        labels={'fecha': 'Fecha', 'rating': 'Rating Elo', 'equipo': 'Equipo'}
+    )
+    st.plotly_chart(fig_elo, use_container_width=True)
+
+# Momento de forma: últimos partidos de cada equipo (incluido el más reciente)
+st.subheader(f"Momento de Forma: Últimos {DEFAULT_FORM_WINDOW} Partidos")
+
+forma = get_current_form()
+st.dataframe(
+    forma[['racha', 'puntos', 'victorias', 'empates', 'derrotas', 'goles_favor', 'goles_contra', 'diferencia_goles']].head(10),
+    use_container_width=True
+)
+st.caption("Racha del partido más antiguo al más reciente: V = victoria, E = empate, D = derrota.")
+
+# Simulación Monte Carlo de las eliminatorias con los 16 equipos más fuertes del modelo de goles
+st.subheader("Simulación de la Fase Final")
+
+simulacion = get_knockout_probabilities()
+progresion = simulacion.pivot(index='equipo', columns='fase', values='probabilidad').sort_values('Campeón', ascending=False)
+campeon = simulacion[simulacion['fase'] == 'Campeón'].sort_values('probabilidad', ascending=False).head(8)
+
+col_sim1, col_sim2 = st.columns([1, 1])
+
+with col_sim1:
+    st.dataframe(progresion.mul(100).round(1), use_container_width=True)
+
+with col_sim2:
+    fig_sim = go.Figure(go.Bar(
+        x=campeon['equipo'],
+        y=campeon['probabilidad'] * 100,
+        error_y=dict(
+            type='data',
+            symmetric=False,
+            array=(campeon['ic_superior'] - campeon['probabilidad']) * 100,
+            arrayminus=(campeon['probabilidad'] - campeon['ic_inferior']) * 100
+        ),
+        marker_color='#1f77b4'
+    ))
+    fig_sim.update_layout(title='Probabilidad de Ser Campeón (IC 95%)', yaxis_title='Probabilidad (%)')
+    st.plotly_chart(fig_sim, use_container_width=True)
+
+st.caption(
+    f"{DEFAULT_SIMULATIONS:,} torneos simulados desde Octavos con sorteo abierto en cada ronda; "
+    "porcentaje de simulaciones en que cada equipo alcanza la fase."
+)
+
 # 2. Storytelling: La Importancia de la Localía
 st.header("2. Insight Clave: El Factor Localía")
 
@@ -68,8 +141,8 @@ with col_s1:
 
 with col_s2:
     # Gráfico comparativo Local vs Visitante
-    goles_local = df['goles_local'].sum()
-    goles_visitante = df['goles_visitante'].sum()
+    goles_local = totales.at[0, 'goles_local']
+    goles_visitante = totales.at[0, 'goles_visitante']
     
     fig_pie = go.Figure(data=[go.Pie(
         labels=['Goles Local', 'Goles Visitante'],
@@ -95,7 +168,7 @@ with col_r1:
 with col_r2:
     st.info("""
     **Para Analistas**
-    * Incorporar variables de "momento de forma" (racha de últimos 5 partidos).
+    * Usar el "momento de forma" (racha de últimos 5 partidos) y el rating Elo previos a cada partido como variables del modelo.
     * Analizar el impacto de jugadores clave (no disponible en este dataset).
     """)
 
@@ -1,7 +1,7 @@
 import streamlit as st
 import google.generativeai as genai
 import pandas as pd
-from utils.data_loader import load_champions_data, prepare_data
+from utils.data_loader import load_champions_data, prepare_data, get_dataset_version, get_team_match_index
 
 st.set_page_config(page_title="IA Generativa", page_icon="🤖")
 
@@ -42,9 +42,9 @@ except Exception as e:
     st.error(f"Error al configurar Gemini: {str(e)}")
     st.stop()
 
-# Cargar contexto de datos
-@st.cache_data
-def get_data_context():
+# Cargar contexto de datos (se reconstruye cuando cambia la versión del dataset)
+@st.cache_data(max_entries=2)
+def get_data_context(version: str):
     df = load_champions_data("all")
     df = prepare_data(df)
     
@@ -53,14 +53,14 @@ def get_data_context():
         "total_partidos": len(df),
         "total_goles": df['total_goles'].sum(),
         "promedio_goles": df['total_goles'].mean(),
-        "equipos_unicos": len(pd.concat([df['equipo_local'], df['equipo_visitante']]).unique()),
+        "equipos_unicos": get_team_match_index().n_teams,
         "temporadas": df['temporada'].unique().tolist(),
         "ejemplo_registros": df.head(5).to_dict(orient='records'),
         "columnas": df.columns.tolist()
     }
     return str(summary)
 
-data_context = get_data_context()
+data_context = get_data_context(get_dataset_version())
 
 # Interfaz de Chat
 st.header("💬 Chat con tus Datos")
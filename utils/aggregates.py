@@ -0,0 +1,110 @@
+"""
+Módulo de agregados precalculados para las visualizaciones de Champions League
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import get_dataset_version, load_champions_data, prepare_data
+
+# Resultados contados en el agregado por partido (categorías de 'resultado')
+RESULT_COLUMNS = ['Victoria Local', 'Empate', 'Victoria Visitante']
+
+# Dimensiones y medidas de cada agregado (una fila por combinación observada)
+MATCH_ROLLUP_DIMENSIONS = ['temporada', 'fase', 'mes']
+MATCH_ROLLUP_MEASURES = ['partidos', 'goles_local', 'goles_visitante', 'total_goles'] + RESULT_COLUMNS
+STADIUM_ROLLUP_DIMENSIONS = ['temporada', 'estadio']
+STADIUM_ROLLUP_MEASURES = ['partidos', 'total_goles']
+
+
+def build_match_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agregado por partido: temporada × fase × mes.
+
+    Cada partido cuenta una sola vez, así que el tamaño depende de las
+    temporadas, fases y meses (unas decenas de filas por temporada), no del
+    número de partidos ni de equipos.
+
+    Args:
+        df: DataFrame procesado con prepare_data
+
+    Returns:
+        DataFrame con MATCH_ROLLUP_DIMENSIONS + MATCH_ROLLUP_MEASURES
+    """
+    matches = pd.DataFrame({
+        'temporada': df['temporada'],
+        'fase': df['fase'],
+        'mes': _month_start(df['fecha']),
+        'partidos': 1,
+        'goles_local': _summable(df['goles_local']),
+        'goles_visitante': _summable(df['goles_visitante']),
+        'total_goles': _summable(df['total_goles']),
+        **{resultado: (df['resultado'] == resultado).astype(np.int64) for resultado in RESULT_COLUMNS}
+    }, index=df.index)
+    return _rollup(matches, MATCH_ROLLUP_DIMENSIONS, MATCH_ROLLUP_MEASURES)
+
+
+def build_stadium_rollup(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agregado por estadio y temporada (partidos y goles totales).
+
+    Args:
+        df: DataFrame procesado con prepare_data
+
+    Returns:
+        DataFrame con STADIUM_ROLLUP_DIMENSIONS + STADIUM_ROLLUP_MEASURES
+    """
+    matches = pd.DataFrame({
+        'temporada': df['temporada'],
+        'estadio': df['estadio'],
+        'partidos': 1,
+        'total_goles': _summable(df['total_goles'])
+    }, index=df.index)
+    return _rollup(matches, STADIUM_ROLLUP_DIMENSIONS, STADIUM_ROLLUP_MEASURES)
+
+
+def _rollup(df: pd.DataFrame, dimensions: list, measures: list) -> pd.DataFrame:
+    return df.groupby(dimensions, observed=True, dropna=False, sort=False)[measures].sum().reset_index()
+
+
+def _summable(values: pd.Series) -> pd.Series:
+    # Sumas en 64 bits (los goles se leen como int8); con nulos se mantienen como float
+    return values.astype(np.float64 if values.dtype.kind == 'f' else np.int64)
+
+
+def _month_start(fechas: pd.Series) -> np.ndarray:
+    return fechas.to_numpy(dtype='datetime64[ns]').astype('datetime64[M]').astype('datetime64[ns]')
+
+
+def get_match_rollup() -> pd.DataFrame:
+    """
+    Agregado por partido (build_match_rollup) del dataset consolidado, calculado una vez por versión.
+
+    Los agregados se comparten entre sesiones: filtrarlos crea un DataFrame
+    nuevo, pero no deben modificarse en el sitio.
+    """
+    return _cached_match_rollup(get_dataset_version())
+
+
+def get_stadium_rollup() -> pd.DataFrame:
+    """
+    Agregado por estadio (build_stadium_rollup) del dataset consolidado, calculado una vez por versión.
+    """
+    return _cached_stadium_rollup(get_dataset_version())
+
+
+@st.cache_resource(max_entries=2)
+def _cached_match_rollup(version: str) -> pd.DataFrame:
+    return build_match_rollup(prepare_data(load_champions_data("all")))
+
+
+@st.cache_resource(max_entries=2)
+def _cached_stadium_rollup(version: str) -> pd.DataFrame:
+    return build_stadium_rollup(prepare_data(load_champions_data("all")))
+
+
+def is_rollup(df: pd.DataFrame) -> bool:
+    """
+    Indica si un DataFrame es (un corte de) uno de los agregados: tiene la medida 'partidos'.
+    """
+    return 'partidos' in df.columns
@@ -0,0 +1,154 @@
+"""
+Módulo de canonicalización de nombres de equipos y estadios (basado en alias_nombres.json)
+"""
+import json
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import combinations
+from pathlib import Path
+
+import pandas as pd
+
+from utils.schema import load_schema
+
+ALIAS_FILE = Path("static/datasets/alias_nombres.json")
+
+# Similitud mínima (entre claves normalizadas) para sugerir un posible duplicado
+NEAR_DUPLICATE_THRESHOLD = 0.85
+
+# Bloques (palabras o prefijos) más frecuentes que esto se consideran genéricos ("fc", "stadium")
+MAX_BLOCK_SIZE = 50
+
+
+def normalize_name(name: str) -> str:
+    """
+    Clave de comparación de un nombre: sin acentos, en minúsculas y sin puntuación.
+
+    Ej: "Paris Saint-Germain" y "paris saint germain" tienen la misma clave.
+    """
+    without_accents = "".join(
+        char for char in unicodedata.normalize("NFKD", str(name)) if not unicodedata.combining(char)
+    )
+    return " ".join(re.sub(r"[^\w\s]|_", " ", without_accents.casefold()).split())
+
+
+@lru_cache(maxsize=1)
+def load_aliases() -> dict:
+    """
+    Lee la tabla de alias y la indexa por clave normalizada.
+
+    Returns:
+        dict dominio -> {clave normalizada: nombre canónico}; el propio nombre
+        canónico también está indexado
+    """
+    with open(ALIAS_FILE, encoding="utf-8") as f:
+        tabla = json.load(f)
+    return {
+        domain: {normalize_name(name): canonical
+                 for canonical, aliases in entries.items() for name in [canonical, *aliases]}
+        for domain, entries in tabla.items()
+    }
+
+
+def column_domain(column: str) -> str | None:
+    """
+    Dominio de nombres de una columna según el esquema (ej: "equipos"), si tiene alias.
+    """
+    spec = load_schema()["columnas"].get(column, {})
+    domain = spec.get("dominio", column)
+    return domain if domain in load_aliases() else None
+
+
+def canonical_names(names, domain: str) -> pd.Index:
+    """
+    Nombre canónico de cada nombre, en el mismo orden.
+
+    Primero se busca la clave normalizada en la tabla de alias; si no está,
+    los nombres con la misma clave se unifican en el primero que aparece.
+    Se aplica al diccionario de categorías, no a cada fila.
+
+    Args:
+        names: Nombres distintos (ej: las categorías de una columna)
+        domain: Dominio de la tabla de alias ("equipos" o "estadios")
+
+    Returns:
+        Index con el nombre canónico de cada nombre
+    """
+    aliases = load_aliases().get(domain, {})
+    keys = [normalize_name(name) for name in names]
+    first_by_key = {}
+    for key, name in zip(keys, names):
+        first_by_key.setdefault(key, name)
+    return pd.Index([aliases.get(key, first_by_key[key]) for key in keys], dtype=object)
+
+
+def name_variants(names, domain: str) -> pd.DataFrame:
+    """
+    Variantes que la canonicalización unifica, con el motivo.
+
+    Returns:
+        DataFrame con Dominio, Nombre, Canónico y Motivo ("alias" o "normalización")
+    """
+    names = pd.Index(names).dropna().unique()
+    canonical = canonical_names(names, domain)
+    # Si solo difieren en acentos, mayúsculas o puntuación basta la clave normalizada
+    rows = [
+        {"Dominio": domain, "Nombre": name, "Canónico": target,
+         "Motivo": "normalización" if normalize_name(name) == normalize_name(target) else "alias"}
+        for name, target in zip(names, canonical) if name != target
+    ]
+    return pd.DataFrame(rows, columns=["Dominio", "Nombre", "Canónico", "Motivo"])
+
+
+def near_duplicates(names, domain: str, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> pd.DataFrame:
+    """
+    Pares de nombres canónicos distintos que podrían ser el mismo (sin resolver en la tabla de alias).
+
+    Solo se comparan los nombres que comparten alguna palabra o los cuatro
+    primeros caracteres (índice clave -> nombres), no todos los pares; los
+    bloques de más de MAX_BLOCK_SIZE nombres se ignoran por genéricos. Un par se sugiere si la similitud de sus
+    claves supera el umbral o si las palabras de uno están contenidas en el otro.
+
+    Returns:
+        DataFrame con Dominio, Nombre, Posible duplicado y Similitud
+    """
+    canonical = pd.Index(canonical_names(pd.Index(names).dropna().unique(), domain)).unique()
+    keys = {name: normalize_name(name) for name in canonical}
+
+    blocks = {}
+    for name, key in keys.items():
+        for block in set(key.split()) | {f"#{key[:4]}"}:
+            blocks.setdefault(block, []).append(name)
+
+    candidates = {tuple(sorted(pair)) for group in blocks.values()
+                  if len(group) <= MAX_BLOCK_SIZE for pair in combinations(group, 2)}
+    rows = []
+    for name_a, name_b in sorted(candidates):
+        words_a, words_b = set(keys[name_a].split()), set(keys[name_b].split())
+        similarity = SequenceMatcher(None, keys[name_a], keys[name_b]).ratio()
+        if similarity >= threshold or words_a <= words_b or words_b <= words_a:
+            rows.append({"Dominio": domain, "Nombre": name_a, "Posible duplicado": name_b,
+                         "Similitud": round(similarity, 2)})
+    return pd.DataFrame(rows, columns=["Dominio", "Nombre", "Posible duplicado", "Similitud"])
+
+
+def name_quality_report(df: pd.DataFrame) -> tuple:
+    """
+    Informe de nombres de equipos y estadios de un DataFrame de partidos.
+
+    Returns:
+        Tupla (variantes que se unifican, posibles duplicados sin resolver)
+    """
+    names_by_domain = {}
+    for col in df.columns:
+        domain = column_domain(col)
+        if domain is not None:
+            values = df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].dropna().unique()
+            names_by_domain.setdefault(domain, []).extend(values)
+
+    variants = [name_variants(names, domain) for domain, names in names_by_domain.items()]
+    duplicates = [near_duplicates(names, domain) for domain, names in names_by_domain.items()]
+    return (pd.concat(variants, ignore_index=True) if variants else name_variants([], "equipos"),
+            pd.concat(duplicates, ignore_index=True) if duplicates else near_duplicates([], "equipos"))
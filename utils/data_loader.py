@@ -2,23 +2,358 @@
 Módulo para cargar y procesar datos de Champions League
 """
 import pandas as pd
+import numpy as np
 import streamlit as st
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import glob
+import os
+import threading
+from utils.data_store import (
+    combine_hashes,
+    count_csv_rows,
+    manifest_entry_is_current,
+    map_cached_frame,
+    read_cached_frame,
+    read_manifest,
+    resolve_hash,
+    write_cached_frame,
+    write_manifest,
+    write_mapped_frame
+)
+from utils.partials import MatchSummary
+from utils.pipeline import CleaningPipeline, fit_fill_values
+from utils.schema import apply_schema, read_raw_match_csv, schema_version, unify_categories
+from utils.validation import INVALID, validate_matches
 
-@st.cache_data
-def load_champions_data(season: str = "all") -> pd.DataFrame:
+# Número de hilos por defecto para leer temporadas en paralelo
+DEFAULT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Filas por bloque en el modo de lectura por bloques (iter_champions_data)
+DEFAULT_CHUNKSIZE = 100_000
+
+# Intervalo (segundos) de la detección automática de cambios en los CSV
+RELOAD_POLL_SECONDS = 30
+
+def load_champions_data(season: str = "all", max_workers: int | None = None) -> pd.DataFrame:
     """
     Carga los datos de Champions League automáticamente desde static/datasets/
     
     Detecta y carga todos los archivos CSV de champions_YYYY_YYYY.csv disponibles.
+    Los datos ya leídos se guardan en una caché Parquet en disco identificada por
+    el hash de cada CSV, de modo que solo se vuelve a parsear un archivo cuando cambia.
+    Con "all" las temporadas se leen en paralelo y se concatenan una sola vez.
+    
+    El consolidado se escribe una vez como archivo Arrow IPC y se mapea en
+    memoria: todos los procesos y sesiones comparten el mismo DataFrame sin
+    copiarlo (por eso no se usa st.cache_data, que lo copiaría en cada acceso).
+    El resultado es de solo lectura: para modificarlo, trabajar sobre una copia
+    (prepare_data ya la hace).
     
     Args:
         season: Temporada específica (ej: "2013_2014") o "all" para todos
+        max_workers: Hilos para la lectura en paralelo (por defecto DEFAULT_MAX_WORKERS, 1 = secuencial)
     
     Returns:
         DataFrame con los datos de Champions League
     """
+    state = get_dataset_state()
+    state.ensure_loaded(max_workers)
+    
+    if season == "all":
+        return state.consolidated()
+    
+    report = state.reports.get(season)
+    if report is not None and report["estado"] == INVALID:
+        raise ValueError(f"La temporada '{season}' no superó la validación: {'; '.join(report['errores'])}")
+    views = state.season_views()
+    if season not in views:
+        temporadas_disponibles = ", ".join(sorted(views.keys()))
+        raise ValueError(f"Temporada '{season}' no encontrada. Disponibles: {temporadas_disponibles}")
+    return views[season]
+
+
+def load_season_views(max_workers: int | None = None) -> dict:
+    """
+    Retorna un DataFrame por temporada a partir de una sola carga del consolidado.
+    
+    Cada temporada es una vista de filas contiguas de load_champions_data("all")
+    (sin copiar ni volver a leer datos), por lo que pedir todas cuesta lo mismo
+    que pedir el consolidado.
+    
+    Args:
+        max_workers: Hilos para la lectura en paralelo
+    
+    Returns:
+        dict temporada (ej: "2013_2014") -> DataFrame de solo lectura, en orden cronológico
+    """
+    state = get_dataset_state()
+    state.ensure_loaded(max_workers)
+    return state.season_views()
+
+
+class DatasetState:
+    """
+    Estado en memoria del dataset (por proceso), actualizable de forma incremental.
+    
+    Guarda cada temporada por separado junto con el hash de su CSV, sus conteos
+    parciales por equipo y su resumen de partidos (MatchSummary), de modo que al
+    recargar solo se vuelven a leer los archivos añadidos o modificados y las
+    estadísticas de cualquier combinación de temporadas se recombinan sin
+    recorrer los partidos.
+    
+    Cada CSV pasa por la validación de esquema antes de incorporarse; los
+    archivos con errores quedan fuera del dataset y su informe en 'reports'.
+    """
+    
+    def __init__(self):
+        self.hashes = {}
+        self.seasons = {}
+        self.reports = {}
+        self.team_counts = {}
+        self.summaries = {}
+        self.version = ""
+        self._consolidated = None
+        self._lock = threading.Lock()
+    
+    def ensure_loaded(self, max_workers: int | None = None) -> None:
+        """
+        Realiza la carga inicial si aún no se ha hecho.
+        """
+        if not self.hashes:
+            self.refresh(max_workers)
+    
+    def refresh(self, max_workers: int | None = None) -> dict:
+        """
+        Detecta los archivos añadidos, eliminados o modificados y los reingesta.
+        
+        Args:
+            max_workers: Hilos para la lectura en paralelo
+        
+        Returns:
+            dict con las listas de temporadas 'añadidas', 'eliminadas' y 'modificadas'
+        """
+        with self._lock:
+            datasets = _discover_datasets()
+            manifest = read_manifest()
+            previous_manifest = {name: dict(entry) for name, entry in manifest.items()}
+            season_names = sorted(datasets)
+            
+            # La lectura y el parseo liberan el GIL en gran parte, por lo que un pool de hilos basta
+            with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_MAX_WORKERS) as pool:
+                hashes = dict(zip(season_names, pool.map(
+                    lambda name: resolve_hash(name, datasets[name], manifest), season_names
+                )))
+                changes = {
+                    "añadidas": [name for name in season_names if name not in self.hashes],
+                    "eliminadas": sorted(name for name in self.hashes if name not in hashes),
+                    "modificadas": [name for name in season_names
+                                    if name in self.hashes and self.hashes[name] != hashes[name]]
+                }
+                to_read = changes["añadidas"] + changes["modificadas"]
+                version = combine_hashes({**hashes, "_esquema": schema_version()})
+                verdicts = {name: _cached_verdict(manifest[name]) for name in to_read}
+                
+                # Arranque en frío: se mapea el consolidado si otro proceso ya lo escribió
+                # (solo contiene las temporadas que superaron la validación)
+                consolidated = map_cached_frame("consolidado", version) if not self.seasons else None
+                if consolidated is not None:
+                    frames = _split_seasons(consolidated)
+                    results = {name: (frames.get(name), None) for name in to_read}
+                else:
+                    results = dict(zip(to_read, pool.map(
+                        lambda name: _read_season(name, datasets[name], hashes[name], verdicts[name]), to_read
+                    )))
+            
+            for name in changes["eliminadas"]:
+                self._drop_season(name)
+                self.reports.pop(name, None)
+            for name in to_read:
+                df, report = results[name]
+                if report is not None:
+                    manifest[name]["validacion"] = {**report, "esquema": schema_version()}
+                self.reports[name] = report or verdicts[name]
+                if df is None:
+                    self._drop_season(name)
+                    continue
+                self.seasons[name] = df
+                self.team_counts[name] = _team_counts(df)
+                self.summaries[name] = MatchSummary.from_frame(df)
+                if "filas" not in manifest.get(name, {}):
+                    manifest[name].update(_season_metadata(df))
+            
+            if to_read or changes["eliminadas"]:
+                self._consolidated = consolidated
+                self.hashes = hashes
+                self.version = version
+            if manifest != previous_manifest:
+                write_manifest(manifest)
+            return changes
+    
+    def consolidated(self) -> pd.DataFrame:
+        """
+        Retorna el DataFrame consolidado de todas las temporadas.
+        """
+        with self._lock:
+            if self._consolidated is None:
+                if not self.seasons:
+                    raise ValueError("Ningún archivo de Champions League superó la validación")
+                dfs = unify_categories([self.seasons[name] for name in sorted(self.seasons)])
+                consolidated = pd.concat(dfs, ignore_index=True)
+                # Se sustituye la copia en memoria por el archivo mapeado
+                if write_mapped_frame("consolidado", self.version, consolidated):
+                    consolidated = map_cached_frame("consolidado", self.version)
+                # Las temporadas pasan a ser vistas del consolidado, sin duplicar datos
+                self.seasons = _split_seasons(consolidated)
+                self._consolidated = consolidated
+            return self._consolidated
+    
+    def season_views(self) -> dict:
+        """
+        Temporadas como vistas del consolidado (lo construye si hace falta).
+        """
+        self.consolidated()
+        with self._lock:
+            return dict(sorted(self.seasons.items()))
+    
+    def team_stats(self, seasons: list | None = None) -> pd.DataFrame:
+        """
+        Estadísticas por equipo combinando los conteos parciales de cada temporada.
+        
+        Args:
+            seasons: Temporadas a incluir (ej: ["2013_2014"]) o None para todas
+        """
+        with self._lock:
+            names = self._season_names(seasons)
+            counts = pd.concat([self.team_counts[name] for name in names]).groupby(level=0).sum()
+        return _finalize_team_stats(counts)
+    
+    def summary(self, seasons: list | None = None) -> MatchSummary:
+        """
+        Resumen de partidos combinando los resúmenes parciales de cada temporada.
+        
+        Args:
+            seasons: Temporadas a incluir (ej: ["2013_2014"]) o None para todas
+        """
+        with self._lock:
+            return sum((self.summaries[name] for name in self._season_names(seasons)), MatchSummary())
+    
+    def _drop_season(self, name: str) -> None:
+        """
+        Quita una temporada (eliminada o rechazada) y sus agregados parciales.
+        """
+        self.seasons.pop(name, None)
+        self.team_counts.pop(name, None)
+        self.summaries.pop(name, None)
+    
+    def _season_names(self, seasons: list | None) -> list:
+        """
+        Normaliza una selección de temporadas ("2013-2014" o "2013_2014").
+        
+        Una selección vacía o None equivale a todas las temporadas.
+        """
+        if not self.seasons:
+            raise ValueError("Ningún archivo de Champions League superó la validación")
+        if not seasons:
+            return sorted(self.seasons)
+        names = [season.replace("-", "_") for season in seasons]
+        missing = [name for name in names if name not in self.seasons]
+        if missing:
+            temporadas_disponibles = ", ".join(sorted(self.seasons.keys()))
+            raise ValueError(f"Temporada '{missing[0]}' no encontrada. Disponibles: {temporadas_disponibles}")
+        return sorted(set(names))
+
+
+@st.cache_resource
+def get_dataset_state() -> DatasetState:
+    """
+    Retorna el estado del dataset compartido por todas las sesiones del proceso.
+    """
+    return DatasetState()
+
+
+def get_dataset_version() -> str:
+    """
+    Retorna la versión actual del dataset (hash combinado de todos los CSV).
+    
+    Sirve como clave de caché para los objetos derivados del dataset.
+    """
+    state = get_dataset_state()
+    state.ensure_loaded()
+    return state.version
+
+
+def get_dataset_team_stats(seasons: list | None = None) -> pd.DataFrame:
+    """
+    Estadísticas por equipo, mantenidas de forma incremental por temporada.
+    
+    Equivale a get_team_stats sobre las temporadas seleccionadas, pero solo
+    suma los conteos parciales de cada temporada (sin recorrer los partidos).
+    
+    Args:
+        seasons: Temporadas a incluir (ej: ["2013-2014"]) o None para todo el histórico
+    """
+    state = get_dataset_state()
+    state.ensure_loaded()
+    return state.team_stats(seasons)
+
+
+def get_dataset_summary(seasons: list | None = None) -> MatchSummary:
+    """
+    Resumen de partidos (KPIs, histograma de goles y correlaciones) de las
+    temporadas seleccionadas, combinando los resúmenes parciales de cada una.
+    
+    Args:
+        seasons: Temporadas a incluir (ej: ["2013-2014"]) o None para todo el histórico
+    """
+    state = get_dataset_state()
+    state.ensure_loaded()
+    return state.summary(seasons)
+
+
+def get_validation_report() -> pd.DataFrame:
+    """
+    Informe de validación por archivo (veredicto guardado por hash en el manifiesto).
+    
+    Returns:
+        DataFrame con temporada, archivo, estado, filas, errores y avisos
+    """
+    state = get_dataset_state()
+    state.ensure_loaded()
+    rows = []
+    for name in sorted(state.hashes):
+        report = state.reports.get(name) or {"estado": "sin validar", "filas": None, "errores": [], "avisos": []}
+        rows.append({
+            "Temporada": name.replace("_", "-"),
+            "Archivo": f"champions_{name}.csv",
+            "Estado": report["estado"],
+            "Filas": report["filas"],
+            "Errores": "; ".join(report["errores"]),
+            "Avisos": "; ".join(report["avisos"])
+        })
+    return pd.DataFrame(rows)
+
+
+def reload_changed_data() -> dict:
+    """
+    Reingesta solo los CSV nuevos, eliminados o modificados.
+    
+    Si hubo cambios se invalida únicamente la caché de get_data_info (no las
+    del resto de la aplicación); los datos se sirven desde el estado compartido.
+    
+    Returns:
+        dict con las temporadas 'añadidas', 'eliminadas' y 'modificadas'
+    """
+    changes = get_dataset_state().refresh()
+    if any(changes.values()):
+        _indexed_data_info.clear()
+    return changes
+
+
+def _discover_datasets() -> dict:
+    """
+    Detecta los archivos champions_*.csv y los asocia a su temporada.
+    """
     base_path = Path("static/datasets")
     
     # Detectar automáticamente todos los archivos champions_*.csv
@@ -33,24 +368,118 @@ def load_champions_data(season: str = "all") -> pd.DataFrame:
         file_name = Path(file_path).stem  # Ej: "champions_2013_2014"
         season_name = file_name.replace("champions_", "")  # Ej: "2013_2014"
         datasets[season_name] = Path(file_path)
+    return datasets
+
+
+def _read_season(season: str, file_path: Path, content_hash: str, verdict: dict | None) -> tuple:
+    """
+    Lee una temporada desde la caché Parquet o, si no existe, desde el CSV.
     
-    if season == "all":
-        dfs = []
-        for season_name, file_path in sorted(datasets.items()):
-            df = pd.read_csv(file_path)
-            df['temporada'] = season_name.replace("_", "-")
-            dfs.append(df)
-        return pd.concat(dfs, ignore_index=True)
-    else:
-        if season not in datasets:
-            temporadas_disponibles = ", ".join(sorted(datasets.keys()))
-            raise ValueError(f"Temporada '{season}' no encontrada. Disponibles: {temporadas_disponibles}")
-        df = pd.read_csv(datasets[season])
+    Si no hay veredicto guardado para este contenido, el CSV se valida con
+    validate_matches antes de convertirlo; un archivo ya validado no se vuelve
+    a validar y uno rechazado no se vuelve a leer.
+    
+    Returns:
+        Tupla (DataFrame o None si no superó la validación, informe nuevo o None)
+    """
+    if verdict is not None and verdict["estado"] == INVALID:
+        return None, None
+    
+    # La clave incluye el esquema: si cambian los tipos, la caché deja de ser válida
+    cache_key = combine_hashes({season: content_hash, "_esquema": schema_version()})
+    df = read_cached_frame(season, cache_key)
+    if df is not None and verdict is not None:
+        return df, None
+    
+    # Una sola lectura sin tipos sirve para validar y para convertir
+    raw = read_raw_match_csv(file_path)
+    report = validate_matches(raw, season) if verdict is None else None
+    if report is not None and report["estado"] == INVALID:
+        return None, report
+    if df is None:
+        df = apply_schema(raw)
         df['temporada'] = season.replace("_", "-")
-        return df
+        write_cached_frame(season, cache_key, df)
+    return df, report
+
+
+def _cached_verdict(entry: dict) -> dict | None:
+    """
+    Veredicto de validación guardado en el manifiesto, si corresponde al esquema actual.
+    
+    resolve_hash descarta la entrada cuando cambia el contenido del archivo,
+    así que el veredicto siempre corresponde al hash actual.
+    """
+    verdict = entry.get("validacion")
+    if verdict is None or verdict.get("esquema") != schema_version():
+        return None
+    return verdict
+
+
+def _season_metadata(df: pd.DataFrame) -> dict:
+    """
+    Metadatos de una temporada que se guardan en el manifiesto al ingerirla.
+    """
+    fechas = pd.to_datetime(df['fecha'], errors='coerce')
+    return {
+        "filas": len(df),
+        "columnas": [col for col in df.columns if col != 'temporada'],
+        "fecha_min": None if fechas.isna().all() else fechas.min().date().isoformat(),
+        "fecha_max": None if fechas.isna().all() else fechas.max().date().isoformat()
+    }
+
+
+def _split_seasons(df: pd.DataFrame) -> dict:
+    """
+    Separa el consolidado (ordenado por temporada) en un DataFrame por temporada.
+    
+    Cada temporada es una vista de filas contiguas del consolidado (sin copiar
+    los datos), con su propio índice desde 0.
+    """
+    temporadas = df['temporada'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, temporadas[1:] != temporadas[:-1]])
+    stops = np.r_[starts[1:], len(df)]
+    seasons = {}
+    for start, stop in zip(starts, stops):
+        view = df.iloc[start:stop]
+        view.index = pd.RangeIndex(stop - start)
+        seasons[str(temporadas[start]).replace("-", "_")] = view
+    return seasons
+
+
+def iter_champions_data(season: str = "all", chunksize: int = DEFAULT_CHUNKSIZE):
+    """
+    Lee los datos de Champions League por bloques, sin cargar todo el histórico.
+    
+    Modo para archivos que no caben en memoria: los CSV se leen directamente
+    (sin la caché Parquet ni el estado compartido) y solo se mantiene un bloque
+    a la vez. Cada bloque se valida y tiene los mismos tipos y la columna
+    'temporada' que load_champions_data.
+    
+    Args:
+        season: Temporada específica (ej: "2013_2014") o "all" para todas, en orden
+        chunksize: Número de filas por bloque
+    
+    Yields:
+        DataFrames tipados de como máximo chunksize filas
+    """
+    datasets = _discover_datasets()
+    if season != "all" and season not in datasets:
+        temporadas_disponibles = ", ".join(sorted(datasets.keys()))
+        raise ValueError(f"Temporada '{season}' no encontrada. Disponibles: {temporadas_disponibles}")
+    
+    for name in sorted(datasets) if season == "all" else [season]:
+        with read_raw_match_csv(datasets[name], chunksize) as reader:
+            for raw in reader:
+                report = validate_matches(raw, name)
+                if report["estado"] == INVALID:
+                    raise ValueError(f"El archivo {datasets[name].name} no superó la validación: "
+                                     f"{'; '.join(report['errores'])}")
+                chunk = apply_schema(raw)
+                chunk['temporada'] = name.replace("_", "-")
+                yield chunk
 
 
-@st.cache_data
 def get_data_info():
     """
     Retorna información sobre los datasets disponibles.
@@ -58,6 +487,12 @@ def get_data_info():
     Detecta automáticamente todos los archivos CSV de Champions League
     en static/datasets/ y proporciona información sobre cada uno.
     
+    Los datos se toman del manifiesto que se mantiene al ingerir cada CSV, sin
+    leer los datos completos; para archivos aún no indexados se cuentan los
+    saltos de línea. Solo se guarda en caché la tabla construida con el
+    manifiesto completo (clave: hash de cada archivo), de modo que la versión
+    provisional previa a la primera ingesta no queda fija.
+    
     Returns:
         DataFrame con información sobre cada dataset
     """
@@ -65,20 +500,50 @@ def get_data_info():
     
     # Detectar automáticamente todos los archivos champions_*.csv
     csv_files = sorted(glob.glob(str(base_path / "champions_*.csv")))
+    manifest = read_manifest()
+    
+    hashes = {}
+    for file_path in csv_files:
+        file_obj = Path(file_path)
+        entry = manifest.get(file_obj.stem.replace("champions_", ""), {})
+        if "filas" in entry and "hash" in entry and manifest_entry_is_current(entry, file_obj):
+            hashes[file_obj.name] = entry["hash"]
     
+    if csv_files and len(hashes) == len(csv_files):
+        return _indexed_data_info(combine_hashes(hashes))
+    return _build_data_info(csv_files, manifest)
+
+
+@st.cache_data(max_entries=4)
+def _indexed_data_info(key: str) -> pd.DataFrame:
+    return _build_data_info(sorted(glob.glob(str(Path("static/datasets") / "champions_*.csv"))), read_manifest())
+
+
+def _build_data_info(csv_files: list, manifest: dict) -> pd.DataFrame:
+    """
+    Construye la tabla de get_data_info a partir del manifiesto (o contando filas).
+    """
     info = []
     for file_path in csv_files:
         file_obj = Path(file_path)
         season = file_obj.stem.replace("champions_", "")
+        entry = manifest.get(season, {})
         
         try:
-            df = pd.read_csv(file_path)
+            if "filas" in entry and manifest_entry_is_current(entry, file_obj):
+                filas, columnas = entry["filas"], entry["columnas"]
+                desde, hasta = entry["fecha_min"], entry["fecha_max"]
+            else:
+                filas, columnas = count_csv_rows(file_obj)
+                desde, hasta = None, None
             info.append({
                 "Temporada": season.replace("_", "-"),
                 "Archivo": file_obj.name,
-                "Filas": len(df),
-                "Columnas": len(df.columns),
-                "Tamaño (KB)": round(file_obj.stat().st_size / 1024, 2)
+                "Filas": filas,
+                "Columnas": len(columnas),
+                "Tamaño (KB)": round(file_obj.stat().st_size / 1024, 2),
+                "Desde": desde,
+                "Hasta": hasta
             })
         except Exception as e:
             info.append({
@@ -86,7 +551,9 @@ def get_data_info():
                 "Archivo": file_obj.name,
                 "Filas": "Error",
                 "Columnas": "Error",
-                "Tamaño (KB)": "Error"
+                "Tamaño (KB)": "Error",
+                "Desde": None,
+                "Hasta": None
             })
     
     if not info:
@@ -95,143 +562,364 @@ def get_data_info():
     return pd.DataFrame(info)
 
 
-def prepare_data(df: pd.DataFrame, clean_duplicates: bool = False, impute_missing: bool = False, unify_consistency: bool = False) -> pd.DataFrame:
+def prepare_data(df: pd.DataFrame, clean_duplicates: bool = False, impute_missing: bool = False,
+                 unify_consistency: bool = False, profile=None) -> pd.DataFrame:
     """
     Prepara y limpia los datos para análisis
     
+    Los pasos están definidos en pipeline.CleaningPipeline; para reutilizar los
+    valores de imputación en otros datos o guardar en caché cada paso, usar el
+    pipeline directamente. El DataFrame original no se modifica.
+    
     Args:
         df: DataFrame con datos crudos
         clean_duplicates: Si es True, elimina filas duplicadas
         impute_missing: Si es True, imputa valores faltantes (numéricos con media, categóricos con moda)
         unify_consistency: Si es True, unifica categorías inconsistentes
+        profile: Perfil ya calculado del mismo df (profiler.DatasetProfile); si se
+            indica, los duplicados y los valores de imputación se toman de él
+            en lugar de volver a recorrer los datos
     
     Returns:
         DataFrame procesado con features adicionales
     """
-    df = df.copy()
-    
-    # 1. Limpieza de Duplicados
-    if clean_duplicates:
-        df = df.drop_duplicates()
-        
-    # 2. Imputación de Valores Faltantes
-    if impute_missing:
-        # Numéricos: Imputar con media
-        numeric_cols = df.select_dtypes(include=['number']).columns
-        for col in numeric_cols:
-            df[col] = df[col].fillna(df[col].mean())
-            
-        # Categóricos: Imputar con moda
-        categorical_cols = df.select_dtypes(include=['object', 'category']).columns
-        for col in categorical_cols:
-            if not df[col].mode().empty:
-                df[col] = df[col].fillna(df[col].mode()[0])
-                
-    # 3. Consistencia de Datos
-    if unify_consistency:
-        # Ejemplo: Unificar nombres de estadios o equipos si hubiera inconsistencias conocidas
-        # Normalización básica de strings (strip whitespace)
-        str_cols = df.select_dtypes(include=['object']).columns
-        for col in str_cols:
-            df[col] = df[col].str.strip()
-            
-        # Ejemplo específico (placeholder para lógica futura)
-        # if 'estadio' in df.columns:
-        #     df['estadio'] = df['estadio'].replace({'Allianz Arena ': 'Allianz Arena'})
+    return CleaningPipeline(clean_duplicates, impute_missing, unify_consistency).fit_transform(df, profile=profile)
+
+
+def iter_prepared_data(season: str = "all", chunksize: int = DEFAULT_CHUNKSIZE,
+                       clean_duplicates: bool = False, impute_missing: bool = False,
+                       unify_consistency: bool = False):
+    """
+    Versión por bloques de prepare_data(load_champions_data(season), ...).
     
-    # 4. Conversión de Tipos
-    df['fecha'] = pd.to_datetime(df['fecha'])
+    Las opciones que dependen de todo el dataset se resuelven sin cargarlo:
+    los duplicados se detectan con un conjunto de hashes de fila (8 bytes por
+    fila distinta) y, si se imputa, una primera pasada acumula sumas y
+    frecuencias para obtener las mismas medias y modas que prepare_data.
     
-    # 5. Feature Engineering
-    df['total_goles'] = df['goles_local'] + df['goles_visitante']
-    df['diferencia_goles'] = df['goles_local'] - df['goles_visitante']
+    Args:
+        season: Temporada específica o "all"
+        chunksize: Número de filas por bloque
+        clean_duplicates, impute_missing, unify_consistency: Como en prepare_data
     
-    # 6. Variable Objetivo (Target)
-    df['resultado'] = df['diferencia_goles'].apply(
-        lambda x: 'Victoria Local' if x > 0 else ('Empate' if x == 0 else 'Victoria Visitante')
-    )
+    Yields:
+        DataFrames procesados, bloque a bloque
+    """
+    def raw_chunks():
+        seen = set()
+        for chunk in iter_champions_data(season, chunksize):
+            if clean_duplicates:
+                chunk = chunk.drop_duplicates()
+                # Los goles pueden ser int8 en un bloque y float32 en otro: se comparan como float64
+                numeric = {col: np.float64 for col in chunk.select_dtypes(include=['number']).columns}
+                hashes = pd.util.hash_pandas_object(chunk.astype(numeric), index=False).to_numpy()
+                is_new = np.fromiter((h not in seen for h in hashes), dtype=bool, count=len(hashes))
+                seen.update(hashes[is_new].tolist())
+                chunk = chunk[is_new]
+            yield chunk
+    
+    # Los valores de imputación se ajustan una vez sobre todos los bloques y se reutilizan en cada uno
+    pipeline = CleaningPipeline(impute_missing=impute_missing, unify_consistency=unify_consistency)
+    pipeline.fill_values = fit_fill_values(raw_chunks()) if impute_missing else {}
+    for chunk in raw_chunks():
+        yield pipeline.transform(chunk)
+
+
+def get_team_stats(df) -> pd.DataFrame:
+    """
+    Calcula estadísticas por equipo
     
-    # 7. Features Temporales
-    df['año'] = df['fecha'].dt.year
-    df['mes'] = df['fecha'].dt.month
-    df['dia_semana'] = df['fecha'].dt.day_name()
+    Incluye partidos, goles, victorias, empates, derrotas y puntos, en total
+    y separados por condición (local / visitante).
     
-    # 8. Ordenar por fase
-    fase_order = ['Grupos', 'Octavos', 'Cuartos', 'Semifinal', 'Final', 'Final Extra']
-    df['fase'] = pd.Categorical(df['fase'], categories=fase_order, ordered=True)
+    Args:
+        df: DataFrame con datos procesados o un iterable de bloques
+            (ej: iter_prepared_data), que se acumulan con memoria acotada
     
-    return df
+    Returns:
+        DataFrame con estadísticas por equipo
+    """
+    if isinstance(df, pd.DataFrame):
+        return _finalize_team_stats(_team_counts(df))
+    
+    # Los conteos son aditivos: cada bloque se suma a los acumulados (una fila por equipo)
+    counts = None
+    for chunk in df:
+        chunk_counts = _team_counts(chunk)
+        counts = chunk_counts if counts is None else pd.concat([counts, chunk_counts]).groupby(level=0).sum()
+    if counts is None:
+        raise ValueError("No hay partidos para calcular estadísticas por equipo")
+    return _finalize_team_stats(counts)
 
 
-def get_team_stats(df: pd.DataFrame) -> pd.DataFrame:
+def get_team_matches(df: pd.DataFrame, context_columns: tuple = ('fecha', 'temporada', 'fase')) -> pd.DataFrame:
     """
-    Calcula estadísticas por equipo
+    Vista larga equipo-partido: una fila por equipo y por partido.
+    
+    Las primeras len(df) filas corresponden al equipo local y las siguientes al
+    visitante; 'partido' es la posición de la fila en el DataFrame original.
     
     Args:
-        df: DataFrame con datos procesados
+        df: DataFrame de partidos (crudo o procesado)
+        context_columns: Columnas del partido que se copian a la vista
     
     Returns:
-        DataFrame con estadísticas por equipo
+        DataFrame con equipo, rival, condicion, goles_favor, goles_contra,
+        resultado_equipo (Victoria/Empate/Derrota) y puntos
     """
-    # Partidos como local
-    local_stats = df.groupby('equipo_local').agg({
-        'goles_local': 'sum',
-        'goles_visitante': 'sum',
-        'equipo_local': 'count'
-    }).rename(columns={
-        'goles_local': 'goles_favor_local',
-        'goles_visitante': 'goles_contra_local',
-        'equipo_local': 'partidos_local'
-    })
-    
-    # Partidos como visitante
-    visitante_stats = df.groupby('equipo_visitante').agg({
-        'goles_visitante': 'sum',
-        'goles_local': 'sum',
-        'equipo_visitante': 'count'
-    }).rename(columns={
-        'goles_visitante': 'goles_favor_visitante',
-        'goles_local': 'goles_contra_visitante',
-        'equipo_visitante': 'partidos_visitante'
-    })
-    
-    # Combinar estadísticas
-    stats = pd.DataFrame(index=list(set(local_stats.index) | set(visitante_stats.index)))
-    
-    for col in local_stats.columns:
-        stats[col] = local_stats[col]
-    for col in visitante_stats.columns:
-        stats[col] = visitante_stats[col]
-    
-    stats = stats.fillna(0)
+    n = len(df)
+    codes_local, codes_visitante, equipos = _team_codes(df)
+    goles_local = df['goles_local'].to_numpy()
+    goles_visitante = df['goles_visitante'].to_numpy()
+    
+    goles_favor = np.concatenate([goles_local, goles_visitante])
+    goles_contra = np.concatenate([goles_visitante, goles_local])
+    diferencia = goles_favor - goles_contra
+    # Con goles nulos no hay resultado (código -1)
+    resultado_codes = np.select([diferencia > 0, diferencia == 0, diferencia < 0], [0, 1, 2], default=-1)
+    
+    long = pd.DataFrame({'partido': np.tile(np.arange(n), 2)})
+    for col in context_columns:
+        if col in df.columns:
+            long[col] = pd.concat([df[col], df[col]], ignore_index=True)
+    long['equipo'] = pd.Categorical.from_codes(np.concatenate([codes_local, codes_visitante]), categories=equipos)
+    long['rival'] = pd.Categorical.from_codes(np.concatenate([codes_visitante, codes_local]), categories=equipos)
+    long['condicion'] = pd.Categorical.from_codes(np.repeat(np.array([0, 1], dtype=np.int8), n),
+                                                  categories=['local', 'visitante'])
+    long['goles_favor'] = goles_favor
+    long['goles_contra'] = goles_contra
+    long['resultado_equipo'] = pd.Categorical.from_codes(resultado_codes.astype(np.int8),
+                                                         categories=['Victoria', 'Empate', 'Derrota'])
+    long['puntos'] = np.array([3, 1, 0, 0], dtype=np.int8)[resultado_codes]
+    return long
+
+
+def _team_codes(df: pd.DataFrame) -> tuple:
+    """
+    Códigos enteros de los equipos local y visitante sobre un diccionario común.
     
-    # Totales
-    stats['partidos_total'] = stats['partidos_local'] + stats['partidos_visitante']
-    stats['goles_favor'] = stats['goles_favor_local'] + stats['goles_favor_visitante']
-    stats['goles_contra'] = stats['goles_contra_local'] + stats['goles_contra_visitante']
-    stats['diferencia_goles'] = stats['goles_favor'] - stats['goles_contra']
+    Si ambas columnas ya comparten categorías se reutilizan sus códigos; si no,
+    se factorizan juntas.
     
-    # Victorias
-    victorias_local = df[df['resultado'] == 'Victoria Local'].groupby('equipo_local').size()
-    victorias_visitante = df[df['resultado'] == 'Victoria Visitante'].groupby('equipo_visitante').size()
+    Returns:
+        Tupla (códigos local, códigos visitante, nombres de equipos)
+    """
+    local, visitante = df['equipo_local'], df['equipo_visitante']
+    if (isinstance(local.dtype, pd.CategoricalDtype) and isinstance(visitante.dtype, pd.CategoricalDtype)
+            and local.cat.categories.equals(visitante.cat.categories)):
+        return local.cat.codes.to_numpy(), visitante.cat.codes.to_numpy(), local.cat.categories
     
-    stats['victorias'] = 0
-    for equipo in stats.index:
-        v_local = victorias_local.get(equipo, 0)
-        v_visitante = victorias_visitante.get(equipo, 0)
-        stats.loc[equipo, 'victorias'] = v_local + v_visitante
+    codes, equipos = pd.factorize(np.concatenate([local.to_numpy(dtype=object), visitante.to_numpy(dtype=object)]), sort=True)
+    return codes[:len(df)], codes[len(df):], pd.Index(equipos)
+
+
+class TeamMatchIndex:
+    """
+    Índice por equipo de los partidos de un DataFrame (estructura tipo CSR).
     
-    # Porcentaje de victorias
-    stats['porcentaje_victorias'] = (stats['victorias'] / stats['partidos_total'] * 100).round(2)
+    Para cada equipo (código entero) guarda las posiciones de fila de sus
+    partidos como local y como visitante, ordenadas cronológicamente, junto
+    con el rival y la condición. Las consultas por equipo, enfrentamientos
+    directos o últimos N partidos cuestan O(k), con k = partidos del equipo.
+    """
     
-    return stats.sort_values('diferencia_goles', ascending=False)
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        codes_local, codes_visitante, equipos = _team_codes(df)
+        codes = np.concatenate([codes_local, codes_visitante])
+        rivals = np.concatenate([codes_visitante, codes_local])
+        rows = np.tile(np.arange(n), 2)
+        is_home = np.repeat(np.array([True, False]), n)
+        
+        if 'fecha' in df.columns:
+            dates = np.tile(pd.to_datetime(df['fecha']).to_numpy(dtype='datetime64[ns]'), 2)
+        else:
+            dates = np.full(2 * n, np.datetime64('NaT', 'ns'))
+        
+        # Orden por equipo, luego por fecha y posición (NaT queda al principio)
+        order = np.lexsort((rows, dates.view('i8'), codes))
+        order = order[codes[order] >= 0]
+        
+        self.teams = pd.Index(equipos)
+        self.positions = rows[order]
+        self.rivals = rivals[order]
+        self.is_home = is_home[order]
+        self.dates = dates[order]
+        self.offsets = np.zeros(len(equipos) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes[codes >= 0], minlength=len(equipos)), out=self.offsets[1:])
+    
+    @property
+    def n_teams(self) -> int:
+        """
+        Número de equipos con al menos un partido.
+        """
+        return int(np.count_nonzero(np.diff(self.offsets)))
+    
+    def team_code(self, team: str) -> int:
+        """
+        Retorna el código entero de un equipo.
+        """
+        code = self.teams.get_indexer([team])[0]
+        if code < 0:
+            raise ValueError(f"Equipo '{team}' no encontrado")
+        return int(code)
+    
+    def matches(self, team: str, role: str | None = None) -> np.ndarray:
+        """
+        Posiciones de los partidos de un equipo, en orden cronológico.
+        
+        Args:
+            team: Nombre del equipo
+            role: "local", "visitante" o None para ambos
+        
+        Returns:
+            Array de posiciones de fila (usar con df.iloc)
+        """
+        block = self._block(team)
+        if role is None:
+            return self.positions[block]
+        return self.positions[block][self.is_home[block] == (role == "local")]
+    
+    def last_n(self, team: str, n: int = 5, before=None) -> np.ndarray:
+        """
+        Posiciones de los últimos n partidos de un equipo (opcionalmente antes de una fecha).
+        
+        Args:
+            team: Nombre del equipo
+            n: Número de partidos
+            before: Fecha límite (exclusiva) o None para todo el histórico
+        
+        Returns:
+            Array de posiciones de fila, del más antiguo al más reciente
+        """
+        block = self._block(team)
+        stop = block.stop
+        if before is not None:
+            stop = block.start + int(np.searchsorted(self.dates[block], np.datetime64(pd.Timestamp(before), 'ns'), side='left'))
+        return self.positions[max(block.start, stop - n):stop]
+    
+    def head_to_head(self, team_a: str, team_b: str) -> np.ndarray:
+        """
+        Posiciones de los enfrentamientos directos entre dos equipos.
+        """
+        block = self._block(team_a)
+        return self.positions[block][self.rivals[block] == self.team_code(team_b)]
+    
+    def _block(self, team: str) -> slice:
+        code = self.team_code(team)
+        return slice(int(self.offsets[code]), int(self.offsets[code + 1]))
+
+
+def get_team_match_index() -> TeamMatchIndex:
+    """
+    Índice por equipo del dataset consolidado, construido una vez por versión.
+    
+    Las posiciones corresponden a las filas de load_champions_data("all")
+    (y de prepare_data con sus opciones por defecto, que no elimina filas).
+    """
+    return _build_team_match_index(get_dataset_version())
+
+
+@st.cache_resource(max_entries=2)
+def _build_team_match_index(version: str) -> TeamMatchIndex:
+    return TeamMatchIndex(load_champions_data("all"))
+
+
+# Conteos aditivos por equipo (columnas con sufijo de condición)
+_COUNT_COLUMNS = ['goles_favor', 'goles_contra', 'partidos', 'victorias', 'empates', 'derrotas']
+
+
+def _team_counts(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Conteos aditivos por equipo y condición, con un único groupby sobre la vista larga.
+    
+    Al ser sumas, los conteos de varias temporadas se pueden combinar
+    sumándolos, lo que permite actualizar las estadísticas de forma incremental.
+    """
+    long = get_team_matches(df, context_columns=())
+    resultado_codes = long['resultado_equipo'].cat.codes
+    # Los goles se acumulan en 64 bits (groupby(...).sum() ya pasa int8 a int64): no convertir
+    # los totales de vuelta a int8, porque las sumas por equipo superan su máximo (127)
+    goles_dtype = np.int64 if pd.api.types.is_integer_dtype(long['goles_favor']) else np.float64
+    long = long.assign(
+        goles_favor=long['goles_favor'].astype(goles_dtype),
+        goles_contra=long['goles_contra'].astype(goles_dtype),
+        partidos=1,
+        victorias=(resultado_codes == 0).astype(np.int64),
+        empates=(resultado_codes == 1).astype(np.int64),
+        derrotas=(resultado_codes == 2).astype(np.int64)
+    )
+    
+    counts = (long.groupby(['equipo', 'condicion'], observed=True)[_COUNT_COLUMNS].sum()
+              .unstack('condicion', fill_value=0))
+    counts.columns = [f"{col}_{condicion}" for col, condicion in counts.columns]
+    counts = counts.reindex(
+        columns=[f"{col}_{condicion}" for condicion in ('local', 'visitante') for col in _COUNT_COLUMNS],
+        fill_value=0
+    )
+    counts.index = counts.index.astype(object).rename(None)
+    return counts
+
+
+def _finalize_team_stats(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula totales, puntos y porcentajes a partir de los conteos aditivos por equipo.
+    """
+    result = stats[['goles_favor_local', 'goles_contra_local', 'partidos_local',
+                    'goles_favor_visitante', 'goles_contra_visitante', 'partidos_visitante']].copy()
+    
+    # Totales
+    result['partidos_total'] = result['partidos_local'] + result['partidos_visitante']
+    result['goles_favor'] = result['goles_favor_local'] + result['goles_favor_visitante']
+    result['goles_contra'] = result['goles_contra_local'] + result['goles_contra_visitante']
+    result['diferencia_goles'] = result['goles_favor'] - result['goles_contra']
+    result['victorias'] = stats['victorias_local'] + stats['victorias_visitante']
+    
+    # Porcentaje de victorias
+    result['porcentaje_victorias'] = (result['victorias'] / result['partidos_total'] * 100).round(2)
+    
+    # Empates, derrotas, puntos y desglose por condición
+    result['empates'] = stats['empates_local'] + stats['empates_visitante']
+    result['derrotas'] = stats['derrotas_local'] + stats['derrotas_visitante']
+    result['puntos'] = 3 * result['victorias'] + result['empates']
+    for condicion in ('local', 'visitante'):
+        for col in ('victorias', 'empates', 'derrotas'):
+            result[f"{col}_{condicion}"] = stats[f"{col}_{condicion}"]
+        result[f"puntos_{condicion}"] = 3 * stats[f"victorias_{condicion}"] + stats[f"empates_{condicion}"]
+    
+    return result.sort_index().sort_values('diferencia_goles', ascending=False, kind='stable')
 
 
 def sidebar_reload_button():
     """
-    Agrega un botón en el sidebar para recargar los datos (limpiar caché)
+    Agrega en el sidebar un botón para recargar solo los CSV que cambiaron
+    y una opción para detectar cambios automáticamente.
     """
     st.sidebar.markdown("---")
-    if st.sidebar.button("🔄 Recargar Datos", help="Limpia la caché para recargar cambios en los CSV"):
-        st.cache_data.clear()
+    if st.sidebar.button("🔄 Recargar Datos", help="Vuelve a leer solo los CSV nuevos, eliminados o modificados"):
+        st.session_state['ultima_recarga'] = reload_changed_data()
+        st.rerun()
+    
+    if st.sidebar.toggle("Detectar cambios automáticamente", key="auto_recarga",
+                         help=f"Revisa los CSV cada {RELOAD_POLL_SECONDS} segundos"):
+        with st.sidebar:
+            _watch_dataset_changes()
+    
+    changes = st.session_state.get('ultima_recarga')
+    if changes is not None:
+        if any(changes.values()):
+            resumen = ", ".join(f"{tipo}: {len(temporadas)}" for tipo, temporadas in changes.items() if temporadas)
+            st.sidebar.caption(f"Temporadas recargadas ({resumen})")
+        else:
+            st.sidebar.caption("Sin cambios en los CSV")
+
+
+@st.fragment(run_every=RELOAD_POLL_SECONDS)
+def _watch_dataset_changes():
+    """
+    Fragmento que se re-ejecuta periódicamente y recarga la app si cambian los CSV.
+    """
+    changes = reload_changed_data()
+    if any(changes.values()):
+        st.session_state['ultima_recarga'] = changes
         st.rerun()
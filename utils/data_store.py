@@ -0,0 +1,326 @@
+"""
+Módulo de almacenamiento en disco (caché columnar) para los datasets de Champions League
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+# Carpeta de caché local (no versionada)
+CACHE_PATH = Path(".cache/datasets")
+MANIFEST_FILE = CACHE_PATH / "manifest.json"
+EXPORTS_PATH = CACHE_PATH / "exports"
+
+
+def file_fingerprint(file_path: Path) -> dict:
+    """
+    Calcula la huella rápida de un archivo fuente (sin leer su contenido).
+
+    Args:
+        file_path: Ruta del archivo CSV
+
+    Returns:
+        dict con nombre, tamaño en bytes y fecha de modificación (ns)
+    """
+    stat = file_path.stat()
+    return {
+        "archivo": file_path.name,
+        "tamaño_bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns
+    }
+
+
+def file_hash(file_path: Path) -> str:
+    """
+    Calcula el hash del contenido de un archivo leyendo por bloques.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def combine_hashes(hashes: dict) -> str:
+    """
+    Combina los hashes de varios archivos en una sola clave estable.
+
+    Args:
+        hashes: Diccionario {temporada: hash}
+
+    Returns:
+        Clave hexadecimal que cambia si cambia cualquier archivo
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name, value in sorted(hashes.items()):
+        digest.update(f"{name}={value};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Calcula el hash del contenido de un DataFrame (columnas, tipos, índice y valores).
+
+    Sirve de clave de caché para DataFrames que no provienen de un archivo.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(col, str(dtype)) for col, dtype in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def read_manifest() -> dict:
+    """
+    Lee el manifiesto de huellas de los archivos fuente ({} si no existe).
+    """
+    try:
+        with open(MANIFEST_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(manifest: dict) -> None:
+    """
+    Guarda el manifiesto de forma atómica (ignora errores de escritura).
+    """
+    data = json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True)
+    try:
+        _atomic_write(MANIFEST_FILE, lambda tmp: Path(tmp).write_text(data, encoding="utf-8"))
+    except OSError:
+        pass
+
+
+def resolve_hash(season: str, file_path: Path, manifest: dict) -> str:
+    """
+    Obtiene el hash de contenido de un archivo de temporada.
+
+    Si el tamaño y la fecha de modificación coinciden con el manifiesto se
+    reutiliza el hash guardado; si no, se recalcula y se actualiza la entrada
+    (el manifiesto se modifica en memoria, guardarlo es responsabilidad del llamador).
+
+    Args:
+        season: Nombre de la temporada (ej: "2013_2014")
+        file_path: Ruta del archivo CSV
+        manifest: Manifiesto leído con read_manifest()
+
+    Returns:
+        Hash hexadecimal del contenido
+    """
+    entry = manifest.get(season, {})
+    if "hash" in entry and manifest_entry_is_current(entry, file_path):
+        return entry["hash"]
+
+    fingerprint = file_fingerprint(file_path)
+    content_hash = file_hash(file_path)
+    # Si solo cambió la fecha de modificación se conservan los metadatos previos
+    previous = entry if entry.get("hash") == content_hash else {}
+    manifest[season] = {**previous, **fingerprint, "hash": content_hash}
+    return content_hash
+
+
+def manifest_entry_is_current(entry: dict, file_path: Path) -> bool:
+    """
+    Indica si una entrada del manifiesto corresponde al archivo actual en disco.
+    """
+    fingerprint = file_fingerprint(file_path)
+    return (entry.get("tamaño_bytes") == fingerprint["tamaño_bytes"]
+            and entry.get("mtime_ns") == fingerprint["mtime_ns"])
+
+
+def count_csv_rows(file_path: Path) -> tuple[int, list]:
+    """
+    Cuenta filas y columnas de un CSV sin parsearlo (contando saltos de línea).
+    
+    Es una aproximación rápida para archivos aún no indexados: no contempla
+    saltos de línea dentro de campos entrecomillados.
+    
+    Args:
+        file_path: Ruta del archivo CSV
+    
+    Returns:
+        Tupla (número de filas sin cabecera, lista de columnas)
+    """
+    newlines = 0
+    last_byte = b"\n"
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        for block in iter(lambda: f.read(1 << 20), b""):
+            newlines += block.count(b"\n")
+            last_byte = block[-1:]
+    
+    rows = newlines + (0 if last_byte == b"\n" else 1)
+    columns = header.decode("utf-8-sig").strip().split(",") if header else []
+    return rows, columns
+
+
+def read_cached_frame(name: str, key: str) -> pd.DataFrame | None:
+    """
+    Lee un DataFrame de la caché Parquet si existe para la clave indicada.
+
+    Args:
+        name: Nombre lógico del dataset (temporada o "consolidado")
+        key: Hash de los archivos fuente
+
+    Returns:
+        DataFrame o None si no hay caché válida
+    """
+    path = _cache_file(name, key)
+    if not path.exists():
+        return None
+    try:
+        return pd.read_parquet(path)
+    except (OSError, ImportError, ValueError):
+        return None
+
+
+def latest_cached_frame(name: str) -> tuple:
+    """
+    Lee la versión guardada de un dataset sea cual sea su clave (la anterior a un cambio).
+
+    Como write_cached_frame conserva una sola versión por nombre, sirve para
+    partir del último resultado calculado y actualizarlo de forma incremental.
+
+    Returns:
+        Tupla (clave, DataFrame) o (None, None) si no hay caché válida
+    """
+    for path in sorted((CACHE_PATH / "frames").glob(f"{name}-*.parquet")):
+        key = path.name[len(name) + 1:-len(".parquet")]
+        df = read_cached_frame(name, key)
+        if df is not None:
+            return key, df
+    return None, None
+
+
+def write_cached_frame(name: str, key: str, df: pd.DataFrame) -> None:
+    """
+    Guarda un DataFrame en la caché Parquet y elimina versiones anteriores.
+
+    Los errores de escritura se ignoran: la caché es solo una optimización.
+    """
+    path = _cache_file(name, key)
+    try:
+        _atomic_write(path, lambda tmp: df.to_parquet(tmp, index=False))
+    except (OSError, ImportError, ValueError):
+        return
+
+    for stale in path.parent.glob(f"{name}-*.parquet"):
+        if stale != path:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+
+
+def map_cached_frame(name: str, key: str) -> pd.DataFrame | None:
+    """
+    Abre un DataFrame guardado con write_mapped_frame mediante un mapeo de memoria.
+
+    Las columnas numéricas y de fechas apuntan directamente al archivo (sin
+    copia), de modo que varios procesos que mapean el mismo archivo comparten
+    las páginas en la caché del sistema operativo. Los arrays son de solo
+    lectura: el DataFrame no debe modificarse en el sitio.
+
+    Args:
+        name: Nombre lógico del dataset (ej: "consolidado")
+        key: Hash de los archivos fuente
+
+    Returns:
+        DataFrame o None si no existe el archivo o pyarrow no está disponible
+    """
+    path = _cache_file(name, key, ".arrow")
+    if not path.exists():
+        return None
+    try:
+        import pyarrow as pa
+        table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        return table.to_pandas(split_blocks=True)
+    except (OSError, ImportError, ValueError):
+        return None
+
+
+def write_mapped_frame(name: str, key: str, df: pd.DataFrame) -> bool:
+    """
+    Guarda un DataFrame como archivo Arrow IPC sin compresión, apto para mapearse en memoria.
+
+    Si otro proceso ya escribió la misma versión no se vuelve a escribir.
+    Las versiones anteriores se eliminan (los procesos que aún las tengan
+    mapeadas conservan su mapeo hasta liberarlo).
+
+    Returns:
+        True si el archivo quedó disponible para map_cached_frame
+    """
+    path = _cache_file(name, key, ".arrow")
+    if not path.exists():
+        try:
+            import pyarrow as pa
+
+            def writer(tmp_name):
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                with pa.OSFile(tmp_name, "wb") as sink, pa.ipc.new_file(sink, table.schema) as ipc_writer:
+                    ipc_writer.write_table(table)
+
+            _atomic_write(path, writer)
+        except (OSError, ImportError, ValueError):
+            return False
+
+    for stale in path.parent.glob(f"{name}-*.arrow"):
+        if stale != path:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+    return True
+
+
+def export_file(name: str, key: str, suffix: str) -> Path:
+    """
+    Ruta del archivo de descarga de un dataset para una versión (exista o no).
+    """
+    return EXPORTS_PATH / f"{name}-{key}{suffix}"
+
+
+def write_export_file(name: str, key: str, suffix: str, writer) -> Path:
+    """
+    Genera un archivo de descarga si aún no existe y elimina versiones anteriores.
+
+    Args:
+        name: Nombre lógico del dataset (ej: "consolidado")
+        key: Versión del dataset
+        suffix: Extensión del formato (ej: ".csv.gz")
+        writer: Función que recibe la ruta temporal y escribe el archivo
+
+    Returns:
+        Ruta del archivo generado
+    """
+    path = export_file(name, key, suffix)
+    if not path.exists():
+        _atomic_write(path, writer)
+
+    for stale in path.parent.glob(f"{name}-*{suffix}"):
+        if stale != path:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+    return path
+
+
+def _cache_file(name: str, key: str, suffix: str = ".parquet") -> Path:
+    return CACHE_PATH / "frames" / f"{name}-{key}{suffix}"
+
+
+def _atomic_write(path: Path, writer) -> None:
+    # Escribe en un temporal y lo renombra para que otros procesos nunca lean archivos a medias
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        writer(tmp_name)
+        os.replace(tmp_name, path)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
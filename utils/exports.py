@@ -0,0 +1,73 @@
+"""
+Módulo de exportación del dataset consolidado (CSV comprimido y Parquet)
+"""
+import gzip
+import threading
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import get_dataset_version, load_champions_data
+from utils.data_store import export_file, write_export_file
+
+# Filas que se convierten a texto a la vez al escribir el CSV
+EXPORT_CHUNK_ROWS = 50_000
+
+# Formatos de descarga disponibles (extensión -> etiqueta y tipo MIME)
+EXPORT_FORMATS = {
+    ".csv.gz": {"etiqueta": "CSV comprimido (gzip)", "mime": "application/gzip"},
+    ".parquet": {"etiqueta": "Parquet", "mime": "application/vnd.apache.parquet"}
+}
+
+_build_lock = threading.Lock()
+
+
+def is_export_ready(fmt: str) -> bool:
+    """
+    Indica si la exportación de la versión actual ya está generada (en cualquier proceso).
+    """
+    return export_file("consolidado", get_dataset_version(), fmt).exists()
+
+
+def get_export_path(fmt: str) -> Path:
+    """
+    Ruta del consolidado exportado en el formato indicado.
+
+    El archivo se genera la primera vez que se pide y se reutiliza mientras no
+    cambie la versión del dataset. Solo la ruta queda en caché; el contenido
+    se lee del disco cuando se crea el botón de descarga (st.download_button
+    lo copia a la memoria de la sesión), así que la página solo debe crearlo
+    cuando el usuario pide la descarga.
+
+    Args:
+        fmt: Extensión del formato (ver EXPORT_FORMATS)
+
+    Returns:
+        Ruta del archivo (abrirla en modo binario para st.download_button)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato '{fmt}' no soportado. Disponibles: {', '.join(EXPORT_FORMATS)}")
+    return _cached_export(get_dataset_version(), fmt)
+
+
+@st.cache_resource(max_entries=len(EXPORT_FORMATS))
+def _cached_export(version: str, fmt: str) -> Path:
+    writer = _write_csv_gz if fmt == ".csv.gz" else _write_parquet
+    # Un solo hilo genera cada archivo; los demás esperan y lo reutilizan
+    with _build_lock:
+        df = load_champions_data("all")
+        return write_export_file("consolidado", version, fmt, lambda tmp: writer(df, tmp))
+
+
+def _write_csv_gz(df: pd.DataFrame, path: str) -> None:
+    """
+    Escribe el CSV comprimido por bloques, sin construir el texto completo en memoria.
+    """
+    with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+        for start in range(0, max(len(df), 1), EXPORT_CHUNK_ROWS):
+            df.iloc[start:start + EXPORT_CHUNK_ROWS].to_csv(f, index=False, header=start == 0)
+
+
+def _write_parquet(df: pd.DataFrame, path: str) -> None:
+    df.to_parquet(path, index=False)
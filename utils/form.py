@@ -0,0 +1,194 @@
+"""
+Módulo de "momento de forma" de los equipos (ventanas móviles sobre la vista equipo-partido)
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import get_dataset_version, get_team_matches, load_champions_data
+
+# Partidos de la ventana de forma por defecto (racha de los últimos 5)
+DEFAULT_FORM_WINDOW = 5
+
+# Estadísticas acumuladas en cada ventana
+FORM_STATS = ('partidos', 'puntos', 'victorias', 'empates', 'derrotas', 'goles_favor', 'goles_contra')
+
+# Letra de cada resultado en la racha (Victoria / Empate / Derrota)
+STREAK_LETTERS = np.array(['V', 'E', 'D', '-'])
+
+
+def rolling_form(long: pd.DataFrame, windows: tuple = (DEFAULT_FORM_WINDOW,), by_condition: bool = True) -> pd.DataFrame:
+    """
+    Forma de cada equipo en sus N partidos estrictamente anteriores a cada partido.
+
+    Las filas se ordenan una vez por equipo, fecha y partido; cada estadística
+    se acumula con una suma acumulada y la suma de la ventana es la diferencia
+    entre dos posiciones de ella (acotada al inicio del bloque del equipo).
+    El coste es lineal en el número de filas, sin bucles por equipo, y el
+    partido actual nunca entra en su propia ventana (sin fuga de información).
+
+    Args:
+        long: Vista equipo-partido (get_team_matches)
+        windows: Tamaños de ventana (ej: (3, 5, 10))
+        by_condition: Si es True, agrega la forma solo como local o solo como
+            visitante (según la condición del partido actual), columnas 'forma_cond_*'
+
+    Returns:
+        DataFrame alineado con long, columnas 'forma_{estadística}_{N}'; 'partidos'
+        cuenta los partidos con marcador de la ventana (menos de N al principio)
+    """
+    values = _form_matrix(long)
+    team_order = _team_order(long)
+    groupings = [('forma', long['equipo'].cat.codes.to_numpy().astype(np.int64), team_order)]
+    if by_condition:
+        # Mismo orden por fecha dentro de cada bloque equipo-condición
+        group = long['equipo'].cat.codes.to_numpy().astype(np.int64) * 2 + long['condicion'].cat.codes.to_numpy()
+        groupings.append(('forma_cond', group, team_order[_stable_argsort(group[team_order])]))
+
+    names = [f'{prefix}_{stat}_{window}' for prefix, _, _ in groupings for window in windows for stat in FORM_STATS]
+    features = np.empty((len(long), len(names)), dtype=np.int32)
+    positions = np.arange(len(long))
+    width = len(windows) * len(FORM_STATS)
+    for g, (prefix, group, order) in enumerate(groupings):
+        starts = _block_starts(group[order])
+        # En 32 bits: aunque la suma acumulada desborde, la resta de dos posiciones es exacta (aritmética modular)
+        cumulative = np.zeros((len(order) + 1, len(FORM_STATS)), dtype=np.int32)
+        np.cumsum(np.take(values, order, axis=0), axis=0, out=cumulative[1:])
+
+        # Suma de la ventana [posición - N, posición) de todas las estadísticas y ventanas,
+        # en el orden por equipo; solo las primeras N filas de cada bloque se acotan a su inicio
+        sums = np.empty((len(order), width), dtype=np.int32)
+        for i, window in enumerate(windows):
+            block = sums[:, i * len(FORM_STATS):(i + 1) * len(FORM_STATS)]
+            block[:] = cumulative[:-1]
+            block[window:] -= cumulative[:-window - 1]
+            clipped = np.flatnonzero(starts > positions - window)
+            block[clipped] = cumulative[clipped] - cumulative[starts[clipped]]
+
+        # Vuelta al orden de long con una sola lectura por fila (permutación inversa)
+        inverse = np.empty_like(order)
+        inverse[order] = positions
+        features[:, g * width:(g + 1) * width] = np.take(sums, inverse, axis=0)
+    return pd.DataFrame(features, index=long.index, columns=names)
+
+
+def current_form(long: pd.DataFrame, window: int = DEFAULT_FORM_WINDOW) -> pd.DataFrame:
+    """
+    Forma actual de cada equipo: sus últimos N partidos (incluido el más reciente).
+
+    Returns:
+        DataFrame indexado por equipo con las estadísticas de FORM_STATS y la
+        racha (ej: "VVEDV", del partido más antiguo al más reciente), ordenado
+        por puntos y diferencia de goles
+    """
+    values = _form_matrix(long)
+    order = _team_order(long)
+    codes = long['equipo'].cat.codes.to_numpy()[order]
+    starts = _block_starts(codes)
+    ends = np.flatnonzero(np.r_[codes[1:] != codes[:-1], True]) + 1
+    # Filas sin equipo (código -1) no forman parte de la tabla
+    ends = ends[codes[ends - 1] >= 0]
+    lower = np.maximum(starts[ends - 1], ends - window)
+
+    cumulative = np.zeros((len(order) + 1, len(FORM_STATS)), dtype=np.int32)
+    np.cumsum(np.take(values, order, axis=0), axis=0, out=cumulative[1:])
+    window_sums = cumulative[ends] - cumulative[lower]
+    table = {stat: window_sums[:, j] for j, stat in enumerate(FORM_STATS)}
+
+    # Racha: resultados de las últimas N posiciones de cada bloque (matriz equipos x N)
+    results = long['resultado_equipo'].cat.codes.to_numpy()[order]
+    positions = ends[:, None] - window + np.arange(window)
+    letters = np.where(positions >= lower[:, None], STREAK_LETTERS[results[np.maximum(positions, 0)]], '')
+    table['racha'] = [''.join(row) for row in letters]
+
+    form = pd.DataFrame(table, index=pd.Index(long['equipo'].cat.categories[codes[ends - 1]], name='equipo'))
+    form['diferencia_goles'] = form['goles_favor'] - form['goles_contra']
+    return form.sort_values(['puntos', 'diferencia_goles'], ascending=False)
+
+
+def match_form_features(df: pd.DataFrame, windows: tuple = (DEFAULT_FORM_WINDOW,), by_condition: bool = True) -> pd.DataFrame:
+    """
+    Forma previa de local y visitante por partido (features del modelo), alineada con df.
+
+    Returns:
+        DataFrame con columnas 'local_forma_*' y 'visitante_forma_*'
+    """
+    features = rolling_form(get_team_matches(df, context_columns=('fecha',)), windows, by_condition)
+    n = len(df)
+    local = features.iloc[:n].add_prefix('local_').set_axis(df.index)
+    visitante = features.iloc[n:].add_prefix('visitante_').set_axis(df.index)
+    return pd.concat([local, visitante], axis=1)
+
+
+def get_match_form_features(windows: tuple = (DEFAULT_FORM_WINDOW,), by_condition: bool = True) -> pd.DataFrame:
+    """
+    match_form_features de load_champions_data("all"), calculado una vez por versión del dataset.
+    """
+    return _cached_match_form(get_dataset_version(), tuple(windows), by_condition)
+
+
+def get_current_form(window: int = DEFAULT_FORM_WINDOW) -> pd.DataFrame:
+    """
+    current_form de load_champions_data("all"), calculado una vez por versión del dataset.
+    """
+    return _cached_current_form(get_dataset_version(), window)
+
+
+@st.cache_resource(max_entries=4)
+def _cached_match_form(version: str, windows: tuple, by_condition: bool) -> pd.DataFrame:
+    return match_form_features(load_champions_data("all"), windows, by_condition)
+
+
+@st.cache_resource(max_entries=4)
+def _cached_current_form(version: str, window: int) -> pd.DataFrame:
+    return current_form(get_team_matches(load_champions_data("all"), context_columns=('fecha',)), window)
+
+
+def _form_matrix(long: pd.DataFrame) -> np.ndarray:
+    """
+    Matriz filas x FORM_STATS con el valor de cada estadística por fila (los partidos sin marcador aportan 0).
+    """
+    results = long['resultado_equipo'].cat.codes.to_numpy()
+    columns = {
+        'partidos': results >= 0,
+        'puntos': long['puntos'].to_numpy(),
+        'victorias': results == 0,
+        'empates': results == 1,
+        'derrotas': results == 2,
+        'goles_favor': np.nan_to_num(long['goles_favor'].to_numpy(dtype=np.float64)),
+        'goles_contra': np.nan_to_num(long['goles_contra'].to_numpy(dtype=np.float64)),
+    }
+    matrix = np.empty((len(long), len(FORM_STATS)), dtype=np.int32)
+    for j, stat in enumerate(FORM_STATS):
+        matrix[:, j] = columns[stat]
+    return matrix
+
+
+def _team_order(long: pd.DataFrame) -> np.ndarray:
+    """
+    Orden de las filas por equipo, fecha y partido.
+
+    Se encadenan ordenaciones estables (partido, fecha y equipo); la última es
+    sobre códigos de equipo pequeños, que numpy ordena por radix en tiempo lineal.
+    """
+    order = np.argsort(long['partido'].to_numpy(), kind='stable')
+    if 'fecha' in long.columns:
+        dates = long['fecha'].to_numpy(dtype='datetime64[ns]').view('i8')
+        order = order[np.argsort(dates[order], kind='stable')]
+    codes = long['equipo'].cat.codes.to_numpy().astype(np.int64)
+    return order[_stable_argsort(codes[order])]
+
+
+def _stable_argsort(keys: np.ndarray) -> np.ndarray:
+    # Con claves de 16 bits numpy usa radix sort
+    if len(keys) and keys.min() >= np.iinfo(np.int16).min and keys.max() <= np.iinfo(np.int16).max:
+        keys = keys.astype(np.int16)
+    return np.argsort(keys, kind='stable')
+
+
+def _block_starts(sorted_group: np.ndarray) -> np.ndarray:
+    """
+    Posición de inicio del bloque (equipo) de cada fila ya ordenada por grupo.
+    """
+    is_start = np.r_[True, sorted_group[1:] != sorted_group[:-1]]
+    return np.maximum.accumulate(np.where(is_start, np.arange(len(sorted_group)), 0))
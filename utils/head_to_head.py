@@ -0,0 +1,178 @@
+"""
+Módulo de enfrentamientos directos (índice por pareja de equipos con agregados acumulados)
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import get_dataset_version, get_team_matches, load_champions_data
+
+# Estadísticas del historial directo, desde el punto de vista de un equipo de la pareja
+H2H_STATS = ('partidos', 'victorias', 'empates', 'derrotas', 'goles_favor', 'goles_contra')
+
+# Permutación de H2H_STATS que cambia el punto de vista al otro equipo de la pareja
+_FLIP = np.array([0, 3, 2, 1, 5, 4])
+
+
+class HeadToHeadIndex:
+    """
+    Índice de enfrentamientos directos por pareja de equipos (sin orden).
+
+    La clave de la pareja combina el código menor y el mayor de los dos
+    equipos, de modo que A-B y B-A comparten bloque. Los partidos se ordenan
+    por pareja, fecha y posición (estructura tipo CSR) y, en ese orden, se
+    guardan las sumas acumuladas de H2H_STATS desde el punto de vista del
+    equipo de código menor. El historial de una pareja hasta una fecha es la
+    diferencia de dos sumas acumuladas, con la posición localizada por
+    búsqueda binaria; los partidos sin fecha o sin marcador no suman.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        n = len(df)
+        long = get_team_matches(df, context_columns=())
+        local = long['equipo'].cat.codes.to_numpy()[:n].astype(np.int64)
+        visitante = long['rival'].cat.codes.to_numpy()[:n].astype(np.int64)
+        self.teams = pd.Index(long['equipo'].cat.categories)
+
+        if 'fecha' in df.columns:
+            dates = pd.to_datetime(df['fecha']).to_numpy(dtype='datetime64[ns]')
+        else:
+            dates = np.full(n, np.datetime64('NaT', 'ns'))
+
+        pair = self._pair_keys(local, visitante)
+        # Orden por pareja, luego por fecha y posición (NaT queda al principio)
+        order = np.lexsort((np.arange(n), dates.view('i8'), pair))
+        order = order[pair[order] >= 0]
+
+        # Estadísticas de cada partido vistas desde el local, giradas si el local es el de código mayor
+        results = long['resultado_equipo'].cat.codes.to_numpy()[:n]
+        counted = (results >= 0) & ~np.isnat(dates)
+        values = np.zeros((n, len(H2H_STATS)), dtype=np.int64)
+        values[:, 0] = counted
+        values[:, 1] = counted & (results == 0)
+        values[:, 2] = counted & (results == 1)
+        values[:, 3] = counted & (results == 2)
+        values[counted, 4] = long['goles_favor'].to_numpy()[:n][counted]
+        values[counted, 5] = long['goles_contra'].to_numpy()[:n][counted]
+        swapped = local > visitante
+        values[swapped] = values[swapped][:, _FLIP]
+
+        self.positions = order
+        self.dates = dates[order]
+        self.pair_keys = pair[order]
+        self.pairs, counts = np.unique(self.pair_keys, return_counts=True)
+        self.offsets = np.zeros(len(self.pairs) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.cumulative = np.zeros((len(order) + 1, len(H2H_STATS)), dtype=np.int64)
+        np.cumsum(values[order], axis=0, out=self.cumulative[1:])
+
+        # Clave pareja + rango de fecha, ya ordenada: búsqueda binaria de "pareja antes de la fecha d"
+        self._date_values, ranks = np.unique(self.dates.view('i8'), return_inverse=True)
+        self._stride = len(self._date_values) + 1
+        self._keys = self.pair_keys * self._stride + ranks
+
+    @property
+    def n_pairs(self) -> int:
+        """
+        Número de parejas que se han enfrentado al menos una vez.
+        """
+        return len(self.pairs)
+
+    def matches(self, team_a: str, team_b: str, before=None) -> np.ndarray:
+        """
+        Posiciones de los enfrentamientos directos entre dos equipos, en orden cronológico.
+
+        Args:
+            team_a: Nombre de un equipo
+            team_b: Nombre del otro equipo
+            before: Fecha límite (exclusiva) o None para todo el histórico
+
+        Returns:
+            Array de posiciones de fila (usar con df.iloc)
+        """
+        block, _ = self._block(team_a, team_b, before)
+        return self.positions[block]
+
+    def summary(self, team_a: str, team_b: str, before=None) -> pd.Series:
+        """
+        Balance del historial directo desde el punto de vista de team_a, en O(log k).
+
+        Returns:
+            Serie con H2H_STATS (victorias y goles_favor son de team_a)
+        """
+        block, swapped = self._block(team_a, team_b, before)
+        totals = self.cumulative[block.stop] - self.cumulative[block.start]
+        return pd.Series(totals[_FLIP] if swapped else totals, index=list(H2H_STATS))
+
+    def features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Historial directo previo a la fecha de cada partido, desde el punto de vista del local.
+
+        Todos los partidos se resuelven a la vez: la clave pareja + rango de
+        fecha de cada uno se busca en las claves ordenadas del índice, así que
+        el coste es O(n log m) en lugar de comparar cada partido con los demás.
+
+        Returns:
+            DataFrame con columnas 'h2h_{estadística}', alineado con df
+        """
+        local = pd.Categorical(df['equipo_local'], categories=self.teams).codes.astype(np.int64)
+        visitante = pd.Categorical(df['equipo_visitante'], categories=self.teams).codes.astype(np.int64)
+        pair = self._pair_keys(local, visitante)
+        query_dates = pd.to_datetime(df['fecha']).to_numpy(dtype='datetime64[ns]').view('i8')
+
+        # El rango de cada fecha es el número de fechas del índice estrictamente anteriores
+        ranks = np.searchsorted(self._date_values, query_dates, side='left')
+        start = np.searchsorted(self._keys, pair * self._stride, side='left')
+        stop = np.searchsorted(self._keys, pair * self._stride + ranks, side='left')
+
+        totals = self.cumulative[stop] - self.cumulative[start]
+        swapped = local > visitante
+        totals[swapped] = totals[swapped][:, _FLIP]
+        totals[pair < 0] = 0
+        return pd.DataFrame(totals, index=df.index, columns=[f'h2h_{stat}' for stat in H2H_STATS])
+
+    def _pair_keys(self, codes_a: np.ndarray, codes_b: np.ndarray) -> np.ndarray:
+        # Clave sin orden de la pareja (-1 si falta algún equipo)
+        key = np.minimum(codes_a, codes_b) * len(self.teams) + np.maximum(codes_a, codes_b)
+        return np.where((codes_a >= 0) & (codes_b >= 0), key, -1)
+
+    def _block(self, team_a: str, team_b: str, before=None) -> tuple:
+        codes = self.teams.get_indexer([team_a, team_b])
+        for team, code in zip((team_a, team_b), codes):
+            if code < 0:
+                raise ValueError(f"Equipo '{team}' no encontrado")
+        if codes[0] == codes[1]:
+            raise ValueError("Los dos equipos del enfrentamiento deben ser distintos")
+
+        key = self._pair_keys(codes[:1].astype(np.int64), codes[1:].astype(np.int64))[0]
+        index = int(np.searchsorted(self.pairs, key))
+        if index == len(self.pairs) or self.pairs[index] != key:
+            return slice(0, 0), False
+        start, stop = int(self.offsets[index]), int(self.offsets[index + 1])
+        if before is not None:
+            stop = start + int(np.searchsorted(self.dates[start:stop], np.datetime64(pd.Timestamp(before), 'ns'), side='left'))
+        return slice(start, stop), bool(codes[0] > codes[1])
+
+
+def get_head_to_head_index() -> HeadToHeadIndex:
+    """
+    Índice de enfrentamientos directos de load_champions_data("all"), construido una vez por versión.
+    """
+    return _cached_head_to_head(get_dataset_version())
+
+
+def get_head_to_head_features() -> pd.DataFrame:
+    """
+    Historial directo previo a cada partido de load_champions_data("all") (columnas 'h2h_*').
+    """
+    return _cached_head_to_head_features(get_dataset_version())
+
+
+@st.cache_resource(max_entries=2)
+def _cached_head_to_head(version: str) -> HeadToHeadIndex:
+    return HeadToHeadIndex(load_champions_data("all"))
+
+
+@st.cache_resource(max_entries=2)
+def _cached_head_to_head_features(version: str) -> pd.DataFrame:
+    return get_head_to_head_index().features(load_champions_data("all"))
@@ -0,0 +1,233 @@
+"""
+Módulo del modelo predictivo de resultados (regresión logística multinomial en NumPy)
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import get_dataset_version, load_champions_data
+from utils.data_store import combine_hashes, frame_fingerprint, read_cached_frame, write_cached_frame
+from utils.form import DEFAULT_FORM_WINDOW, get_match_form_features
+from utils.head_to_head import get_head_to_head_features
+from utils.query import scan
+from utils.ratings import get_rating_features
+from utils.schema import get_categories
+
+# Features previas al partido (ninguna usa el marcador del propio partido)
+DEFAULT_FEATURES = (
+    'elo_diferencia',
+    'forma_puntos_diferencia',
+    'forma_goles_diferencia',
+    'forma_condicion_puntos_diferencia',
+    'h2h_balance',
+    'fase_eliminatoria',
+)
+
+# Hiperparámetros del entrenamiento por defecto
+DEFAULT_PARAMS = {'l2': 0.01, 'learning_rate': 0.5, 'max_iter': 2000, 'tol': 1e-6}
+
+
+class OutcomeModel:
+    """
+    Regresión logística multinomial (softmax) con regularización L2.
+
+    Las features se estandarizan con la media y la desviación del
+    entrenamiento y los pesos (una columna por resultado) se ajustan por
+    descenso de gradiente con lotes completos: cada iteración son dos
+    productos de matrices, así que con unos cientos de partidos el ajuste
+    tarda milisegundos. Los parámetros ajustados se exportan como DataFrame
+    (to_frame / from_frame) para guardarlos en la caché en disco.
+    """
+
+    def __init__(self, l2: float = DEFAULT_PARAMS['l2'], learning_rate: float = DEFAULT_PARAMS['learning_rate'],
+                 max_iter: int = DEFAULT_PARAMS['max_iter'], tol: float = DEFAULT_PARAMS['tol']):
+        self.l2 = l2
+        self.learning_rate = learning_rate
+        self.max_iter = max_iter
+        self.tol = tol
+        self.classes = list(get_categories('resultado'))
+        self.features = []
+        self.mean = None
+        self.scale = None
+        self.weights = None
+        self.n_iter = 0
+
+    def fit(self, X: pd.DataFrame, y: pd.Series) -> "OutcomeModel":
+        """
+        Ajusta el modelo; se descartan las filas sin resultado.
+
+        Args:
+            X: Features por partido
+            y: Resultado de cada partido (categorías de 'resultado')
+
+        Returns:
+            El propio modelo ajustado
+        """
+        codes = pd.Categorical(y, categories=self.classes).codes
+        known = codes >= 0
+        if not known.any():
+            raise ValueError("No hay partidos con resultado para entrenar el modelo")
+
+        values = X.to_numpy(dtype=np.float64)[known]
+        self.features = list(X.columns)
+        self.mean = values.mean(axis=0)
+        self.scale = values.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+
+        design = self._design(values)
+        targets = np.eye(len(self.classes))[codes[known]]
+        weights = np.zeros((design.shape[1], len(self.classes)))
+        penalty = np.full((design.shape[1], 1), self.l2)
+        penalty[0] = 0.0  # El intercepto no se regulariza
+
+        for self.n_iter in range(1, self.max_iter + 1):
+            gradient = design.T @ (_softmax(design @ weights) - targets) / len(design) + penalty * weights
+            weights -= self.learning_rate * gradient
+            if np.abs(gradient).max() < self.tol:
+                break
+        self.weights = weights
+        return self
+
+    def predict_proba(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        Probabilidad de cada resultado para todos los partidos a la vez.
+
+        Returns:
+            DataFrame con una columna por resultado, alineado con X
+        """
+        if self.weights is None:
+            raise ValueError("El modelo no está ajustado: llamar primero a fit")
+        values = X[self.features].to_numpy(dtype=np.float64)
+        return pd.DataFrame(_softmax(self._design(values) @ self.weights), index=X.index, columns=self.classes)
+
+    def predict(self, X: pd.DataFrame) -> pd.Series:
+        """
+        Resultado más probable de cada partido.
+        """
+        proba = self.predict_proba(X).to_numpy()
+        return pd.Series(pd.Categorical.from_codes(proba.argmax(axis=1), categories=self.classes), index=X.index)
+
+    def coefficients(self) -> pd.DataFrame:
+        """
+        Pesos por feature (estandarizada) y resultado: positivo = favorece ese resultado.
+        """
+        return pd.DataFrame(self.weights[1:], index=self.features, columns=self.classes)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Parámetros ajustados en formato tabular (una fila por intercepto y feature).
+        """
+        frame = pd.DataFrame(self.weights, columns=self.classes)
+        frame.insert(0, 'parametro', ['intercepto'] + self.features)
+        frame.insert(1, 'media', np.r_[0.0, self.mean])
+        frame.insert(2, 'escala', np.r_[1.0, self.scale])
+        frame['iteraciones'] = self.n_iter
+        return frame
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "OutcomeModel":
+        """
+        Reconstruye un modelo ajustado a partir de to_frame.
+        """
+        model = cls()
+        model.features = frame['parametro'].iloc[1:].tolist()
+        model.mean = frame['media'].to_numpy()[1:]
+        model.scale = frame['escala'].to_numpy()[1:]
+        model.weights = frame[model.classes].to_numpy()
+        model.n_iter = int(frame['iteraciones'].iloc[0])
+        return model
+
+    def _design(self, values: np.ndarray) -> np.ndarray:
+        # Columna de unos (intercepto) + features estandarizadas
+        return np.column_stack([np.ones(len(values)), (values - self.mean) / self.scale])
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    exp = np.exp(scores - scores.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def build_model_features(df: pd.DataFrame, ratings: pd.DataFrame, form: pd.DataFrame, h2h: pd.DataFrame) -> pd.DataFrame:
+    """
+    Features previas al partido a partir de rating, forma e historial directo.
+
+    Args:
+        df: DataFrame de partidos (fase)
+        ratings: Ratings previos (get_rating_features)
+        form: Forma previa de local y visitante (get_match_form_features)
+        h2h: Historial directo previo (get_head_to_head_features)
+
+    Returns:
+        DataFrame con las columnas de DEFAULT_FEATURES, alineado con df
+    """
+    w = DEFAULT_FORM_WINDOW
+    goles_local = form[f'local_forma_goles_favor_{w}'] - form[f'local_forma_goles_contra_{w}']
+    goles_visitante = form[f'visitante_forma_goles_favor_{w}'] - form[f'visitante_forma_goles_contra_{w}']
+    return pd.DataFrame({
+        'elo_diferencia': ratings['elo_diferencia'],
+        'forma_puntos_diferencia': form[f'local_forma_puntos_{w}'] - form[f'visitante_forma_puntos_{w}'],
+        'forma_goles_diferencia': goles_local - goles_visitante,
+        # Forma del local en casa frente a la del visitante fuera
+        'forma_condicion_puntos_diferencia': form[f'local_forma_cond_puntos_{w}'] - form[f'visitante_forma_cond_puntos_{w}'],
+        'h2h_balance': h2h['h2h_victorias'] - h2h['h2h_derrotas'],
+        'fase_eliminatoria': (df['fase'].astype(object) != 'Grupos').astype(np.int8),
+    }, index=df.index)
+
+
+def get_model_features() -> pd.DataFrame:
+    """
+    build_model_features de load_champions_data("all"), calculado una vez por versión del dataset.
+    """
+    return _cached_model_features(get_dataset_version())
+
+
+def get_outcome_model(train_seasons: tuple, features: tuple = DEFAULT_FEATURES, params: dict | None = None) -> OutcomeModel:
+    """
+    Modelo ajustado con los partidos de las temporadas indicadas.
+
+    Los parámetros se guardan en la caché en disco con una clave que combina
+    la versión del dataset, las temporadas, la huella de las features y del
+    resultado de entrenamiento (nombres, tipos y valores) y los
+    hiperparámetros: mientras no cambien, se reutiliza el modelo en lugar de
+    volver a entrenarlo.
+
+    Args:
+        train_seasons: Temporadas de entrenamiento (ej: ("2013-2014", "2014-2015"))
+        features: Columnas de get_model_features a usar
+        params: Hiperparámetros de OutcomeModel (por defecto DEFAULT_PARAMS)
+    """
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    return _cached_outcome_model(get_dataset_version(), tuple(train_seasons), tuple(features),
+                                 tuple(sorted(params.items())))
+
+
+@st.cache_resource(max_entries=2)
+def _cached_model_features(version: str) -> pd.DataFrame:
+    df = load_champions_data("all")
+    return build_model_features(df, get_rating_features(), get_match_form_features(), get_head_to_head_features())
+
+
+@st.cache_resource(max_entries=8)
+def _cached_outcome_model(version: str, train_seasons: tuple, features: tuple, params: tuple) -> OutcomeModel:
+    # Resultado y temporada de cada partido, en el mismo orden que load_champions_data("all")
+    target = scan().select('temporada', 'resultado').collect()
+    train = target['temporada'].isin(train_seasons).to_numpy()
+    X_train = get_model_features().loc[train, list(features)]
+    y_train = target.loc[train, ['resultado']]
+
+    # La huella de los valores de entrenamiento cubre cambios en la definición de las
+    # features (Elo, forma, historial directo) aunque sus nombres y los datos sean los mismos
+    key = combine_hashes({
+        "datos": version,
+        "temporadas": ",".join(train_seasons),
+        "features": frame_fingerprint(X_train),
+        "objetivo": frame_fingerprint(y_train),
+        "parametros": repr(params),
+    })
+    frame = read_cached_frame("modelo", key)
+    if frame is not None:
+        return OutcomeModel.from_frame(frame)
+
+    model = OutcomeModel(**dict(params)).fit(X_train, y_train['resultado'])
+    write_cached_frame("modelo", key, model.to_frame())
+    return model
@@ -0,0 +1,97 @@
+"""
+Módulo de agregados parciales combinables (por temporada) de los partidos
+"""
+import numpy as np
+import pandas as pd
+
+# Variables numéricas de la matriz de correlación
+CORRELATION_COLUMNS = ['goles_local', 'goles_visitante', 'total_goles', 'diferencia_goles']
+
+
+class MatchSummary:
+    """
+    Resumen aditivo de un conjunto de partidos.
+
+    Guarda conteos, sumas, el histograma de goles totales y los co-momentos
+    centrados de las variables de goles. Dos resúmenes se combinan con '+'
+    (fórmula de Chan et al. para los co-momentos), de modo que el resumen de
+    cualquier combinación de temporadas se obtiene en tiempo proporcional al
+    número de temporadas, sin recorrer los partidos.
+    """
+
+    def __init__(self, partidos: int = 0, goles=0, partidos_con_goles: int = 0,
+                 histogram: pd.Series | None = None, mean: np.ndarray | None = None,
+                 comoments: np.ndarray | None = None):
+        k = len(CORRELATION_COLUMNS)
+        self.partidos = partidos
+        self.goles = goles
+        self.partidos_con_goles = partidos_con_goles
+        self.histogram = histogram if histogram is not None else pd.Series(dtype=np.int64)
+        self.mean = mean if mean is not None else np.zeros(k)
+        self.comoments = comoments if comoments is not None else np.zeros((k, k))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "MatchSummary":
+        """
+        Calcula el resumen de un DataFrame de partidos (crudo o procesado).
+        """
+        goles_local = df['goles_local'].to_numpy()
+        goles_visitante = df['goles_visitante'].to_numpy()
+        # Mismo tipo que total_goles en prepare_data; la suma se acumula en 64 bits
+        total = goles_local + goles_visitante
+        acumulador = np.float64 if total.dtype.kind == 'f' else np.int64
+
+        # Con goles nulos el partido no aporta a goles, histograma ni correlaciones
+        valid = ~np.isnan(total) if total.dtype.kind == 'f' else np.ones(len(total), dtype=bool)
+        values = np.column_stack([goles_local, goles_visitante, total, goles_local - goles_visitante])
+        values = values[valid].astype(np.float64)
+        mean = values.mean(axis=0) if len(values) else np.zeros(len(CORRELATION_COLUMNS))
+        centered = values - mean
+
+        return cls(
+            partidos=len(df),
+            goles=total[valid].sum(dtype=acumulador).item(),
+            partidos_con_goles=int(valid.sum()),
+            histogram=pd.Series(total[valid]).value_counts().sort_index(),
+            mean=mean,
+            comoments=centered.T @ centered
+        )
+
+    def __add__(self, other: "MatchSummary") -> "MatchSummary":
+        n_a, n_b = self.partidos_con_goles, other.partidos_con_goles
+        n = n_a + n_b
+        delta = other.mean - self.mean
+        mean = self.mean + delta * (n_b / n) if n else self.mean
+        comoments = self.comoments + other.comoments
+        if n:
+            comoments = comoments + np.outer(delta, delta) * (n_a * n_b / n)
+        return MatchSummary(
+            partidos=self.partidos + other.partidos,
+            goles=self.goles + other.goles,
+            partidos_con_goles=n,
+            histogram=self.histogram.add(other.histogram, fill_value=0).astype(np.int64),
+            mean=mean,
+            comoments=comoments
+        )
+
+    @property
+    def promedio_goles(self) -> float:
+        """
+        Promedio de goles por partido (ignorando partidos sin marcador).
+        """
+        return self.goles / self.partidos_con_goles if self.partidos_con_goles else float('nan')
+
+    def goals_histogram(self) -> pd.DataFrame:
+        """
+        Histograma de goles totales: una fila por valor con su número de partidos.
+        """
+        return pd.DataFrame({'total_goles': self.histogram.index, 'partidos': self.histogram.to_numpy()})
+
+    def correlation(self) -> pd.DataFrame:
+        """
+        Matriz de correlación de Pearson de CORRELATION_COLUMNS.
+        """
+        std = np.sqrt(np.diag(self.comoments))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoments / np.outer(std, std)
+        return pd.DataFrame(corr, index=CORRELATION_COLUMNS, columns=CORRELATION_COLUMNS)
@@ -0,0 +1,308 @@
+"""
+Módulo del pipeline de limpieza y preparación de partidos (pasos con nombre y caché por paso)
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.canonical import canonical_names, column_domain
+from utils.data_store import combine_hashes, frame_fingerprint
+from utils.schema import get_categories, get_dtype, load_schema, unify_categories
+
+# Pasos en orden de ejecución; los tres primeros dependen de las opciones de limpieza
+STEPS = ("dedupe", "impute", "unify", "types", "features", "target", "temporal", "phase_order")
+
+
+class CleaningPipeline:
+    """
+    Limpieza y feature engineering de prepare_data como secuencia de pasos con nombre.
+
+    Los estadísticos de imputación (medias y modas) se ajustan una vez y se
+    guardan en fill_values: transform los reutiliza sobre datos nuevos (otra
+    temporada, un bloque) sin recalcularlos. run_cached guarda la salida de
+    cada paso según la huella de su entrada y sus parámetros, de modo que al
+    cambiar una opción solo se recalculan ese paso y los posteriores.
+    """
+
+    def __init__(self, clean_duplicates: bool = False, impute_missing: bool = False,
+                 unify_consistency: bool = False):
+        self.clean_duplicates = clean_duplicates
+        self.impute_missing = impute_missing
+        self.unify_consistency = unify_consistency
+        # Valores de imputación por columna (None = sin ajustar)
+        self.fill_values: dict | None = None
+
+    def steps(self) -> list:
+        """
+        Nombres de los pasos activos, en orden de ejecución.
+        """
+        optional = {"dedupe": self.clean_duplicates, "impute": self.impute_missing,
+                    "unify": self.unify_consistency}
+        return [name for name in STEPS if optional.get(name, True)]
+
+    def fit(self, df: pd.DataFrame, profile=None) -> "CleaningPipeline":
+        """
+        Ajusta los valores de imputación sobre df (sin sus duplicados si se eliminan).
+
+        Args:
+            df: DataFrame con datos crudos
+            profile: Perfil ya calculado del mismo df (profiler.DatasetProfile)
+        """
+        if self.clean_duplicates and profile is None:
+            df = _apply_step(df, "dedupe", {})
+        self._fit_imputation(df, profile)
+        return self
+
+    def transform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Aplica los pasos activos con los estadísticos ya ajustados.
+        """
+        if self.impute_missing and self.fill_values is None:
+            raise ValueError("El pipeline no está ajustado: llamar a fit antes de transform")
+        for name in self.steps():
+            df = _apply_step(df, name, self._params(name))
+        return df
+
+    def fit_transform(self, df: pd.DataFrame, profile=None) -> pd.DataFrame:
+        """
+        Ajusta y aplica el pipeline en una sola pasada (la imputación se ajusta
+        sobre la salida del paso de duplicados).
+        """
+        self.fill_values = None
+        for name in self.steps():
+            if name == "impute":
+                self._fit_imputation(df, profile)
+            df = _apply_step(df, name, self._params(name), profile)
+        return df
+
+    def run_cached(self, df: pd.DataFrame, key: str | None = None, profile=None) -> pd.DataFrame:
+        """
+        Como fit_transform, pero con la salida de cada paso en caché.
+
+        La clave de cada paso combina la de su entrada con su nombre y sus
+        parámetros, así que dos ejecuciones que comparten los primeros pasos
+        reutilizan sus resultados. Si ya estaba ajustado se usan sus valores de
+        imputación.
+
+        Args:
+            df: DataFrame con datos crudos (no se modifica)
+            key: Huella de df (ej: get_dataset_version()); por defecto se calcula
+                con frame_fingerprint
+            profile: Perfil ya calculado del mismo df (profiler.DatasetProfile)
+        """
+        key = key or frame_fingerprint(df)
+        for name in self.steps():
+            if name == "impute" and self.fill_values is None:
+                self._fit_imputation(df, profile)
+            params = self._params(name)
+            key = combine_hashes({"entrada": key, "paso": name, "parametros": repr(params)})
+            df = _cached_step(key, name, df, params, profile)
+        return df
+
+    def _params(self, name: str) -> dict:
+        return {"fill_values": self.fill_values} if name == "impute" else {}
+
+    def _fit_imputation(self, df: pd.DataFrame, profile) -> None:
+        if not self.impute_missing:
+            self.fill_values = {}
+        elif profile is not None:
+            self.fill_values = profile.fill_values(deduplicated=self.clean_duplicates)
+        else:
+            self.fill_values = _frame_fill_values(df)
+
+
+def apply_steps(df: pd.DataFrame, names) -> pd.DataFrame:
+    """
+    Aplica solo algunos de los pasos sin ajuste (ej: "features" y "target"), en el orden del pipeline.
+
+    Sirve para derivar columnas de prepare_data sobre un subconjunto de filas o columnas.
+    """
+    if "impute" in names:
+        raise ValueError("El paso 'impute' necesita un pipeline ajustado")
+    for name in STEPS:
+        if name in names:
+            df = _apply_step(df, name, {})
+    return df
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cached_step(key: str, name: str, _df: pd.DataFrame, _params: dict, _profile) -> pd.DataFrame:
+    return _apply_step(_df, name, _params, _profile)
+
+
+def _apply_step(df: pd.DataFrame, name: str, params: dict, profile=None) -> pd.DataFrame:
+    """
+    Ejecuta un paso sobre una copia superficial: la entrada (que puede estar en caché) no se modifica.
+    """
+    df = df.copy(deep=False)
+    if name == "dedupe":
+        return df[~profile.duplicated] if profile is not None else df.drop_duplicates()
+    return _STEP_FUNCTIONS[name](df, **params)
+
+
+def _impute(df: pd.DataFrame, fill_values: dict) -> pd.DataFrame:
+    return fill_chunk(df, fill_values) if fill_values else df
+
+
+def _unify(df: pd.DataFrame) -> pd.DataFrame:
+    # Normalización básica de strings (strip whitespace) y nombres canónicos
+    # de equipos y estadios (tabla de alias + clave normalizada)
+    str_cols = list(df.select_dtypes(include=['object']).columns)
+    category_cols = list(df.select_dtypes(include=['category']).columns)
+    for col in str_cols:
+        df[col] = df[col].str.strip()
+
+    # Los nombres canónicos se resuelven una vez por dominio con los nombres de todas
+    # sus columnas (equipo local y visitante), para que una variante se unifique igual en ambas
+    domain_names = {}
+    for col in str_cols + category_cols:
+        domain = column_domain(col)
+        if domain is not None:
+            names = df[col].cat.categories.str.strip() if col in category_cols else pd.unique(df[col].dropna())
+            domain_names.setdefault(domain, []).append(pd.Index(names, dtype=object))
+    mappings = {}
+    for domain, names in domain_names.items():
+        names = names[0].append(names[1:]).unique()
+        mappings[domain] = dict(zip(names, canonical_names(names, domain)))
+
+    for col in str_cols:
+        if column_domain(col) is not None:
+            df[col] = df[col].map(mappings[column_domain(col)])
+
+    # Categóricas: se normaliza el diccionario de categorías, no cada fila
+    for col in category_cols:
+        df[col] = recode_categories(df[col], lambda categories, mapping=mappings.get(column_domain(col)): (
+            categories.str.strip() if mapping is None else categories.str.strip().map(mapping)
+        ))
+    # Las columnas de un mismo dominio (equipo local / visitante) vuelven a compartir diccionario
+    if len(category_cols) > 0:
+        df = unify_categories([df])[0]
+    return df
+
+
+def _convert_types(df: pd.DataFrame) -> pd.DataFrame:
+    if not pd.api.types.is_datetime64_any_dtype(df['fecha']):
+        df['fecha'] = pd.to_datetime(df['fecha'], format=load_schema()['columnas']['fecha']['formato'])
+    return df
+
+
+def _goal_features(df: pd.DataFrame) -> pd.DataFrame:
+    # Se operan en el tipo declarado para cada derivada: en int8, 100 + 100 desborda sin aviso
+    df['total_goles'] = _widen(df['goles_local'], 'total_goles') + df['goles_visitante']
+    df['diferencia_goles'] = _widen(df['goles_local'], 'diferencia_goles') - df['goles_visitante']
+    return df
+
+
+def _widen(goles: pd.Series, column: str) -> pd.Series:
+    # Con nulos los goles ya son float y no desbordan
+    return goles.astype(get_dtype(column)) if pd.api.types.is_integer_dtype(goles) else goles
+
+
+def _target(df: pd.DataFrame) -> pd.DataFrame:
+    # Código 0/1/2 según el signo de la diferencia
+    diferencia = df['diferencia_goles'].to_numpy()
+    resultado_codes = np.select([diferencia > 0, diferencia == 0], [0, 1], default=2).astype(np.int8)
+    df['resultado'] = pd.Categorical.from_codes(resultado_codes, categories=get_categories('resultado'))
+    return df
+
+
+def _temporal_features(df: pd.DataFrame) -> pd.DataFrame:
+    fechas = df['fecha'].dt
+    df['año'] = fechas.year
+    df['mes'] = fechas.month
+    dia_codes = fechas.dayofweek.fillna(-1).to_numpy().astype(np.int8)
+    df['dia_semana'] = pd.Categorical.from_codes(dia_codes, categories=get_categories('dia_semana'))
+    return df
+
+
+def _phase_order(df: pd.DataFrame) -> pd.DataFrame:
+    df['fase'] = pd.Categorical(df['fase'], categories=get_categories('fase'), ordered=True)
+    return df
+
+
+_STEP_FUNCTIONS = {
+    "impute": _impute,
+    "unify": _unify,
+    "types": _convert_types,
+    "features": _goal_features,
+    "target": _target,
+    "temporal": _temporal_features,
+    "phase_order": _phase_order,
+}
+
+
+def _frame_fill_values(df: pd.DataFrame) -> dict:
+    """
+    Medias (numéricas) y modas (textos) de las columnas con nulos de un DataFrame.
+    """
+    null_cols = df.columns[df.isna().any().to_numpy()]
+    if len(null_cols) == 0:
+        return {}
+
+    # Numéricos: Imputar con media
+    numeric_cols = df[null_cols].select_dtypes(include=['number']).columns
+    fill_values = df[numeric_cols].mean().to_dict()
+
+    # Categóricos: Imputar con moda
+    categorical_cols = df[null_cols].select_dtypes(include=['object', 'category']).columns
+    for col in categorical_cols:
+        mode = df[col].mode()
+        if not mode.empty:
+            fill_values[col] = mode[0]
+    return fill_values
+
+
+def fill_chunk(chunk: pd.DataFrame, fill_values: dict) -> pd.DataFrame:
+    """
+    Imputa un bloque; el valor ajustado puede no estar entre las categorías del bloque.
+    """
+    fill_values = {col: value for col, value in fill_values.items()
+                   if col in chunk.columns and chunk[col].hasnans}
+    for col, value in fill_values.items():
+        if isinstance(chunk[col].dtype, pd.CategoricalDtype) and value not in chunk[col].cat.categories:
+            chunk[col] = chunk[col].cat.add_categories([value])
+    return chunk.fillna(fill_values) if fill_values else chunk
+
+
+def fit_fill_values(chunks) -> dict:
+    """
+    Medias (numéricas) y modas (textos) de imputación acumuladas bloque a bloque.
+
+    Igual que el pipeline, solo se calculan para columnas con algún nulo.
+    """
+    sums, counts, frequencies, has_nulls = {}, {}, {}, set()
+    for chunk in chunks:
+        has_nulls.update(chunk.columns[chunk.isna().any().to_numpy()])
+        for col in chunk.select_dtypes(include=['number']).columns:
+            sums[col] = sums.get(col, 0.0) + float(chunk[col].sum())
+            counts[col] = counts.get(col, 0) + int(chunk[col].count())
+        for col in chunk.select_dtypes(include=['object', 'category']).columns:
+            counts_chunk = chunk[col].value_counts()
+            counts_chunk.index = counts_chunk.index.astype(object)
+            frequencies[col] = counts_chunk if col not in frequencies else frequencies[col].add(counts_chunk, fill_value=0)
+
+    fill_values = {col: sums[col] / counts[col] for col in sums if col in has_nulls and counts[col]}
+    for col, frequency in frequencies.items():
+        if col in has_nulls and len(frequency) and frequency.max() > 0:
+            # Como Series.mode: en caso de empate, el menor valor
+            fill_values[col] = frequency[frequency == frequency.max()].index.sort_values()[0]
+    return fill_values
+
+
+def recode_categories(series: pd.Series, transform) -> pd.Series:
+    """
+    Aplica una transformación al diccionario de categorías y recodifica la columna.
+
+    El coste es proporcional al número de categorías distintas, no al de filas.
+    Si dos categorías quedan iguales tras la transformación se fusionan.
+    """
+    new_values = pd.Index(transform(series.cat.categories))
+    new_categories = new_values.unique()
+    mapping = new_categories.get_indexer(new_values)
+    codes = series.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, mapping[codes], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, new_categories, ordered=series.cat.ordered),
+        index=series.index,
+        name=series.name
+    )
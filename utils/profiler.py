@@ -0,0 +1,125 @@
+"""
+Módulo de perfilado del dataset en una sola pasada (diagnóstico y limpieza)
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import DEFAULT_MAX_WORKERS, get_dataset_version, load_champions_data
+
+
+class DatasetProfile:
+    """
+    Perfil de un DataFrame: duplicados y estadísticas por columna.
+
+    Se calcula recorriendo cada columna una sola vez (nulos, valores distintos,
+    mínimo, máximo, moda, media y memoria) y hasheando cada fila para detectar
+    duplicados. Además de alimentar el diagnóstico, sirve a prepare_data
+    (argumento profile) para eliminar duplicados e imputar sin volver a
+    recorrer los datos.
+    """
+
+    def __init__(self, df: pd.DataFrame, max_workers: int | None = None):
+        self.filas = len(df)
+        # Duplicados por hash de fila (como DataFrame.duplicated: se conserva la primera aparición)
+        self.duplicated = pd.Series(pd.util.hash_pandas_object(df, index=False).to_numpy()).duplicated().to_numpy()
+        self.duplicados = int(self.duplicated.sum())
+
+        with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_MAX_WORKERS) as pool:
+            stats = list(pool.map(lambda col: _column_profile(df[col], self.duplicated), df.columns))
+        self.columns = pd.DataFrame([s["perfil"] for s in stats])
+        self._fill_values = {
+            deduplicated: {col: s["relleno"][deduplicated] for col, s in zip(df.columns, stats)
+                           if s["relleno"][deduplicated] is not None}
+            for deduplicated in (False, True)
+        }
+
+    @property
+    def null_counts(self) -> pd.Series:
+        """
+        Nulos por columna (como df.isnull().sum()).
+        """
+        return self.columns.set_index("Columna")["Nulos"].rename(None).rename_axis(None)
+
+    def fill_values(self, deduplicated: bool = False) -> dict:
+        """
+        Valores de imputación de las columnas con nulos: media (numéricas) o moda (textos).
+
+        Args:
+            deduplicated: Si es True, calculados sin las filas duplicadas (como
+                prepare_data cuando además elimina duplicados)
+        """
+        return dict(self._fill_values[deduplicated])
+
+
+def get_dataset_profile() -> DatasetProfile:
+    """
+    Perfil de load_champions_data("all"), calculado una vez por versión del dataset.
+    """
+    return _cached_profile(get_dataset_version())
+
+
+@st.cache_resource(max_entries=2)
+def _cached_profile(version: str) -> DatasetProfile:
+    return DatasetProfile(load_champions_data("all"))
+
+
+def _column_profile(series: pd.Series, duplicated: np.ndarray) -> dict:
+    """
+    Estadísticas de una columna y sus valores de imputación (con y sin duplicados).
+    """
+    dtype = series.dtype
+    nulls = series.isna().to_numpy()
+    minimum = maximum = mean = None
+
+    if isinstance(dtype, pd.CategoricalDtype):
+        # Conteos por código: moda y cardinalidad sin materializar los textos
+        codes = series.cat.codes.to_numpy()
+        counts = np.bincount(codes[codes >= 0], minlength=len(dtype.categories))
+        distinct = int(np.count_nonzero(counts))
+        mode = dtype.categories[int(counts.argmax())] if distinct else None
+        if dtype.ordered and distinct:
+            present = np.flatnonzero(counts)
+            minimum, maximum = dtype.categories[present[0]], dtype.categories[present[-1]]
+    else:
+        counts = series.value_counts(sort=False)
+        distinct = len(counts)
+        mode = counts.index[counts.to_numpy() == counts.max()].sort_values()[0] if distinct else None
+        if distinct and (pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_datetime64_any_dtype(dtype)):
+            minimum, maximum = counts.index.min(), counts.index.max()
+        if distinct and pd.api.types.is_numeric_dtype(dtype):
+            # Media a partir de los conteos por valor (sin otra pasada por la columna)
+            mean = float(np.dot(counts.index.to_numpy(dtype=np.float64), counts.to_numpy()) / counts.sum())
+
+    fill = {False: None, True: None}
+    if nulls.any():
+        # Mismo cálculo que prepare_data: media para numéricas, moda para textos
+        for deduplicated in (False, True):
+            values = series[~duplicated] if deduplicated else series
+            if pd.api.types.is_numeric_dtype(dtype):
+                fill[deduplicated] = values.mean()
+            elif isinstance(dtype, pd.CategoricalDtype) or dtype == object:
+                values_mode = values.mode()
+                fill[deduplicated] = None if values_mode.empty else values_mode[0]
+
+    return {
+        "perfil": {
+            "Columna": series.name,
+            "Tipo": str(dtype),
+            "Nulos": int(nulls.sum()),
+            "Distintos": distinct,
+            "Mínimo": _as_text(minimum),
+            "Máximo": _as_text(maximum),
+            "Moda": _as_text(mode),
+            "Media": mean,
+            "Memoria (KB)": round(series.memory_usage(deep=True, index=False) / 1024, 2)
+        },
+        "relleno": fill
+    }
+
+
+def _as_text(value) -> str | None:
+    # Columnas de tipos mezclados (fechas, números, textos): se muestran como texto
+    return None if value is None else str(value)
@@ -0,0 +1,306 @@
+"""
+Módulo de consultas diferidas sobre el dataset de partidos (plan de filtros, columnas y agregados)
+"""
+import operator
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import get_dataset_state, get_dataset_version
+from utils.data_store import combine_hashes
+from utils.pipeline import apply_steps
+
+# Columnas que prepare_data deriva de otras: columna -> (paso del pipeline, columnas de las que depende)
+DERIVED_COLUMNS = {
+    "total_goles": ("features", ("goles_local", "goles_visitante")),
+    "diferencia_goles": ("features", ("goles_local", "goles_visitante")),
+    "resultado": ("target", ("goles_local", "goles_visitante")),
+    "año": ("temporal", ("fecha",)),
+    "mes": ("temporal", ("fecha",)),
+    "dia_semana": ("temporal", ("fecha",)),
+}
+
+# Funciones de agregación admitidas en Query.agg
+AGGREGATIONS = ("size", "count", "sum", "mean", "min", "max", "nunique")
+
+_OPERATORS = {
+    "==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+    ">": operator.gt, ">=": operator.ge, "&": operator.and_, "|": operator.or_,
+}
+
+
+class Expr:
+    """
+    Expresión sobre columnas del dataset, ej: (col("fase") == "Final") & (col("goles_local") > 2).
+
+    Se compone con ==, !=, <, <=, >, >=, isin, &, | y ~, y se evalúa columna a
+    columna sobre un dict {columna: Series}. Su repr es estable y forma parte
+    del hash del plan.
+    """
+
+    def __init__(self, op: str, *args):
+        self.op = op
+        self.args = args
+
+    def columns(self) -> set:
+        """
+        Columnas que usa la expresión.
+        """
+        if self.op == "col":
+            return {self.args[0]}
+        return set().union(*(arg.columns() for arg in self.args if isinstance(arg, Expr)))
+
+    def evaluate(self, frame) -> pd.Series:
+        """
+        Evalúa la expresión sobre un DataFrame o un dict {columna: Series}.
+        """
+        if self.op == "col":
+            return frame[self.args[0]]
+        if self.op == "isin":
+            return self.args[0].evaluate(frame).isin(self.args[1])
+        if self.op == "~":
+            return ~self.args[0].evaluate(frame)
+        left, right = (arg.evaluate(frame) if isinstance(arg, Expr) else arg for arg in self.args)
+        return _OPERATORS[self.op](left, right)
+
+    def isin(self, values) -> "Expr":
+        return Expr("isin", self, tuple(sorted(set(values), key=repr)))
+
+    def __eq__(self, other) -> "Expr":
+        return Expr("==", self, other)
+
+    def __ne__(self, other) -> "Expr":
+        return Expr("!=", self, other)
+
+    def __lt__(self, other) -> "Expr":
+        return Expr("<", self, other)
+
+    def __le__(self, other) -> "Expr":
+        return Expr("<=", self, other)
+
+    def __gt__(self, other) -> "Expr":
+        return Expr(">", self, other)
+
+    def __ge__(self, other) -> "Expr":
+        return Expr(">=", self, other)
+
+    def __and__(self, other: "Expr") -> "Expr":
+        return Expr("&", self, other)
+
+    def __or__(self, other: "Expr") -> "Expr":
+        return Expr("|", self, other)
+
+    def __invert__(self) -> "Expr":
+        return Expr("~", self)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        if self.op == "col":
+            return f"col({self.args[0]!r})"
+        if self.op == "isin":
+            return f"{self.args[0]!r}.isin({list(self.args[1])!r})"
+        if self.op == "~":
+            return f"~{self.args[0]!r}"
+        return f"({self.args[0]!r} {self.op} {self.args[1]!r})"
+
+
+def col(name: str) -> Expr:
+    """
+    Referencia a una columna del dataset (cruda o derivada, ver DERIVED_COLUMNS).
+    """
+    return Expr("col", name)
+
+
+class Query:
+    """
+    Plan de consulta diferido sobre las temporadas del dataset.
+
+    filter, select, group_by y agg devuelven un plan nuevo sin leer datos; al
+    ejecutarlo con collect:
+
+    * Los filtros que solo usan 'temporada' se resuelven con el nombre de cada
+      temporada, y las temporadas descartadas no se leen.
+    * Solo se toman las columnas que el plan usa (proyección); las derivadas
+      (total_goles, resultado, año, ...) se calculan con los pasos del
+      pipeline a partir de sus columnas base, y solo para las filas que pasan
+      los filtros sobre columnas base.
+    * El resultado se guarda en caché según la versión del dataset y el hash del plan.
+    """
+
+    def __init__(self, predicates: tuple = (), columns: tuple | None = None,
+                 keys: tuple = (), aggregations: tuple = ()):
+        self.predicates = predicates
+        self.columns = columns
+        self.keys = keys
+        self.aggregations = aggregations
+
+    def filter(self, predicate: Expr) -> "Query":
+        """
+        Agrega un filtro (se combina con los anteriores con 'y').
+        """
+        return Query(self.predicates + (predicate,), self.columns, self.keys, self.aggregations)
+
+    def select(self, *columns: str) -> "Query":
+        """
+        Columnas del resultado (sin agregados).
+        """
+        return Query(self.predicates, tuple(columns), self.keys, self.aggregations)
+
+    def group_by(self, *keys: str) -> "Query":
+        """
+        Columnas de agrupación de los agregados.
+        """
+        return Query(self.predicates, self.columns, tuple(keys), self.aggregations)
+
+    def agg(self, **aggregations: tuple) -> "Query":
+        """
+        Agregados con nombre, como en pandas: nombre=(columna, función).
+
+        Funciones admitidas: ver AGGREGATIONS.
+        """
+        for name, (column, function) in aggregations.items():
+            if function not in AGGREGATIONS:
+                raise ValueError(f"Agregado '{name}': función '{function}' no admitida ({', '.join(AGGREGATIONS)})")
+        return Query(self.predicates, self.columns, self.keys,
+                     self.aggregations + tuple((name, tuple(spec)) for name, spec in aggregations.items()))
+
+    def key(self) -> str:
+        """
+        Hash del plan (dos planes equivalentes escritos igual comparten resultado en caché).
+        """
+        return combine_hashes({"plan": repr(self)})
+
+    def explain(self) -> dict:
+        """
+        Qué leería el plan: temporadas, columnas base y pasos de derivación.
+        """
+        views = get_dataset_state().season_views()
+        base, steps, _ = self._projection(views)
+        return {"temporadas": self._pruned_seasons(views), "columnas": base, "pasos": steps}
+
+    def collect(self) -> pd.DataFrame:
+        """
+        Ejecuta el plan (o lo toma de la caché).
+
+        Returns:
+            Filas filtradas con las columnas seleccionadas o, con agregados, una
+            fila por grupo con las claves como columnas
+        """
+        return _cached_collect(get_dataset_version(), self.key(), self)
+
+    def __repr__(self) -> str:
+        return (f"Query(filtros={list(self.predicates)!r}, columnas={self.columns!r}, "
+                f"grupos={self.keys!r}, agregados={self.aggregations!r})")
+
+    def _used_columns(self) -> list:
+        used = list(self.columns or ())
+        used += [column for predicate in self.predicates for column in sorted(predicate.columns())]
+        used += list(self.keys) + [column for _, (column, _) in self.aggregations]
+        return list(dict.fromkeys(used))
+
+    def _projection(self, views: dict) -> tuple:
+        """
+        Columnas base a leer, pasos del pipeline para las derivadas y columnas del resultado.
+        """
+        available = list(next(iter(views.values())).columns)
+        used = self._used_columns()
+        # Sin select ni agregados se devuelven todas las columnas crudas
+        output = list(self.columns) if self.columns is not None else available
+        if self.columns is None and not self.aggregations:
+            used = list(dict.fromkeys(available + used))
+        unknown = [column for column in used if column not in available and column not in DERIVED_COLUMNS]
+        if unknown:
+            raise ValueError(f"Columna desconocida en la consulta: {unknown[0]}. "
+                             f"Disponibles: {', '.join(available + list(DERIVED_COLUMNS))}")
+
+        derived = [column for column in used if column in DERIVED_COLUMNS]
+        base = [column for column in available
+                if column in used or any(column in DERIVED_COLUMNS[d][1] for d in derived)]
+        steps = {DERIVED_COLUMNS[column][0] for column in derived}
+        if "target" in steps:
+            steps.add("features")
+        # Mismos tipos que prepare_data: fechas convertidas y fases ordenadas
+        if "fecha" in base:
+            steps.add("types")
+        if "fase" in base:
+            steps.add("phase_order")
+        return base, sorted(steps), output
+
+    def _pruned_seasons(self, views: dict) -> list:
+        """
+        Temporadas que pueden cumplir los filtros que solo dependen de 'temporada'.
+        """
+        season_predicates = [predicate for predicate in self.predicates if predicate.columns() == {"temporada"}]
+        names = list(views)
+        if not season_predicates:
+            return names
+        labels = {"temporada": pd.Series([name.replace("_", "-") for name in names], dtype=object)}
+        mask = np.logical_and.reduce([np.asarray(predicate.evaluate(labels), dtype=bool)
+                                      for predicate in season_predicates])
+        return [name for name, keep in zip(names, mask) if keep]
+
+    def _execute(self) -> pd.DataFrame:
+        views = get_dataset_state().season_views()
+        base, steps, output = self._projection(views)
+        base_predicates = [predicate for predicate in self.predicates
+                           if predicate.columns() != {"temporada"} and predicate.columns() <= set(base)]
+        derived_predicates = [predicate for predicate in self.predicates
+                              if predicate.columns() - set(base)]
+
+        pieces = []
+        for name in self._pruned_seasons(views):
+            # Solo las columnas del plan; las Series son vistas de la temporada hasta filtrar
+            columns = {column: views[name][column] for column in base}
+            if base_predicates:
+                mask = np.logical_and.reduce([np.asarray(predicate.evaluate(columns), dtype=bool)
+                                              for predicate in base_predicates])
+                columns = {column: series[mask] for column, series in columns.items()}
+            pieces.append(pd.DataFrame(columns))
+        if pieces:
+            frame = pd.concat(pieces, ignore_index=True)
+        else:
+            # Ninguna temporada cumple los filtros: resultado vacío con los mismos tipos
+            frame = pd.DataFrame({column: next(iter(views.values()))[column].iloc[:0] for column in base})
+
+        frame = apply_steps(frame, steps)
+        if derived_predicates:
+            mask = np.logical_and.reduce([np.asarray(predicate.evaluate(frame), dtype=bool)
+                                          for predicate in derived_predicates])
+            frame = frame[mask].reset_index(drop=True)
+
+        if not self.aggregations:
+            if self.keys:
+                raise ValueError("group_by necesita al menos un agregado (agg)")
+            return frame[output]
+        return _aggregate(frame, list(self.keys), dict(self.aggregations))
+
+
+def scan() -> Query:
+    """
+    Plan que lee todas las temporadas del dataset consolidado (punto de partida de una consulta).
+    """
+    return Query()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_collect(version: str, plan_key: str, _query: Query) -> pd.DataFrame:
+    return _query._execute()
+
+
+def _aggregate(frame: pd.DataFrame, keys: list, aggregations: dict) -> pd.DataFrame:
+    """
+    Agregados con nombre; las sumas y medias se acumulan en 64 bits (los goles son int8).
+    """
+    widen = {column for column, function in aggregations.values()
+             if function in ("sum", "mean") and pd.api.types.is_numeric_dtype(frame[column].dtype)}
+    for column in widen:
+        frame[column] = frame[column].astype(np.float64 if frame[column].dtype.kind == "f" else np.int64)
+
+    if keys:
+        return frame.groupby(keys, observed=True).agg(**aggregations).reset_index()
+    return pd.DataFrame({
+        name: [len(frame) if function == "size" else getattr(frame[column], function)()]
+        for name, (column, function) in aggregations.items()
+    })
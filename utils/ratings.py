@@ -0,0 +1,287 @@
+"""
+Módulo de ratings Elo de los equipos (procesados por fecha y actualizados de forma incremental)
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import get_dataset_state, get_dataset_version, load_champions_data
+from utils.data_store import latest_cached_frame, write_cached_frame
+
+# Rating de un equipo antes de su primer partido
+INITIAL_RATING = 1500.0
+
+# Puntos que se reparten en cada partido (antes del factor por diferencia de goles)
+K_FACTOR = 20.0
+
+# Puntos Elo que se suman al local al calcular el resultado esperado (ventaja de localía)
+HOME_ADVANTAGE = 60.0
+
+
+class EloRatings:
+    """
+    Ratings Elo de los equipos con término de localía y factor por diferencia de goles.
+
+    El estado son arrays indexados por código de equipo (rating y partidos
+    jugados). Los partidos de una misma fecha se procesan juntos, de forma
+    vectorizada, con los ratings previos a esa fecha. Tras cada fecha se
+    registra un evento (fecha, equipo, rating, partidos) por equipo que jugó:
+    con ese historial se consultan los ratings a cualquier fecha y se
+    reconstruye el estado sin volver a procesar los partidos.
+
+    update solo acepta partidos posteriores al último procesado, de modo que
+    una temporada nueva se incorpora en tiempo proporcional a sus partidos.
+    """
+
+    def __init__(self, k_factor: float = K_FACTOR, home_advantage: float = HOME_ADVANTAGE,
+                 initial_rating: float = INITIAL_RATING):
+        self.k_factor = k_factor
+        self.home_advantage = home_advantage
+        self.initial_rating = initial_rating
+        self.teams = []
+        self.ratings = np.empty(0)
+        self.partidos = np.empty(0, dtype=np.int64)
+        self.last_date = None
+        # Temporada (ej: "2013_2014") -> hash del CSV ya procesado
+        self.seasons = {}
+        self._codes = {}
+        self._events = []
+        self._events_frame = None
+
+    def update(self, df: pd.DataFrame, hashes: dict | None = None) -> int:
+        """
+        Procesa partidos posteriores al último procesado, en orden de fecha.
+
+        Se omiten los partidos sin fecha, equipos o marcador.
+
+        Args:
+            df: DataFrame de partidos (como load_champions_data)
+            hashes: Hash del CSV de cada temporada de df (para saber qué se procesó)
+
+        Returns:
+            Número de partidos procesados
+        """
+        fechas = df['fecha'].to_numpy(dtype='datetime64[ns]')
+        goles_local = df['goles_local'].to_numpy(dtype=np.float64)
+        goles_visitante = df['goles_visitante'].to_numpy(dtype=np.float64)
+        valid = (~np.isnat(fechas) & ~np.isnan(goles_local) & ~np.isnan(goles_visitante)
+                 & df['equipo_local'].notna().to_numpy() & df['equipo_visitante'].notna().to_numpy())
+        if self.last_date is not None and valid.any() and fechas[valid].min() <= self.last_date:
+            raise ValueError(
+                f"Los partidos deben ser posteriores al último procesado ({pd.Timestamp(self.last_date).date()}); "
+                "recalcular los ratings desde cero"
+            )
+
+        order = np.flatnonzero(valid)[np.argsort(fechas[valid], kind='stable')]
+        fechas = fechas[order]
+        home = self._team_codes(df['equipo_local'].to_numpy()[order])
+        away = self._team_codes(df['equipo_visitante'].to_numpy()[order])
+        diferencia = goles_local[order] - goles_visitante[order]
+        score = np.where(diferencia > 0, 1.0, np.where(diferencia == 0, 0.5, 0.0))
+        weight = self.k_factor * _goal_margin(diferencia)
+        temporadas = df['temporada'].to_numpy()[order]
+
+        dates, starts = np.unique(fechas, return_index=True)
+        bounds = np.r_[starts, len(fechas)]
+        for date, start, stop in zip(dates, bounds[:-1], bounds[1:]):
+            h, a = home[start:stop], away[start:stop]
+            expected = 1.0 / (1.0 + 10.0 ** ((self.ratings[a] - self.ratings[h] - self.home_advantage) / 400.0))
+            delta = weight[start:stop] * (score[start:stop] - expected)
+            np.add.at(self.ratings, h, delta)
+            np.add.at(self.ratings, a, -delta)
+            np.add.at(self.partidos, h, 1)
+            np.add.at(self.partidos, a, 1)
+            played = np.unique(np.concatenate([h, a]))
+            self._events.append((date, temporadas[start], played, self.ratings[played], self.partidos[played]))
+
+        if len(dates):
+            self.last_date = dates[-1]
+            self._events_frame = None
+        for season in pd.unique(temporadas):
+            name = str(season).replace("-", "_")
+            self.seasons[name] = (hashes or {}).get(name)
+        return len(order)
+
+    def table(self) -> pd.DataFrame:
+        """
+        Rating actual y partidos jugados de cada equipo, de mayor a menor rating.
+        """
+        table = pd.DataFrame({'rating': self.ratings, 'partidos': self.partidos},
+                             index=pd.Index(self.teams, name='equipo'))
+        return table.sort_values('rating', ascending=False)
+
+    def ratings_as_of(self, fecha) -> pd.Series:
+        """
+        Rating de cada equipo tras los partidos jugados hasta la fecha indicada (incluida).
+        """
+        events = self.events()
+        events = events[events['fecha'] <= pd.Timestamp(fecha)]
+        ratings = events.groupby('equipo', observed=True)['rating'].last()
+        return ratings.sort_values(ascending=False)
+
+    def history(self, teams=None) -> pd.DataFrame:
+        """
+        Evolución del rating (una fila por equipo y fecha en que jugó), para graficar.
+
+        Args:
+            teams: Equipos a incluir o None para todos
+        """
+        events = self.events()
+        if teams is not None:
+            events = events[events['equipo'].isin(list(teams))]
+        return events[['fecha', 'equipo', 'rating']].reset_index(drop=True)
+
+    def pre_match_ratings(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Ratings de local y visitante antes de la fecha de cada partido (features sin fuga de información).
+
+        Returns:
+            DataFrame con elo_local, elo_visitante y elo_diferencia, alineado con df
+        """
+        events = self.events()
+        codes = events['equipo'].cat.codes.to_numpy().astype(np.int64)
+        event_dates = events['fecha'].to_numpy(dtype='datetime64[ns]')
+        query_dates = df['fecha'].to_numpy(dtype='datetime64[ns]')
+
+        # Clave equipo + rango de fecha: con los eventos ordenados por ella, el
+        # último evento estrictamente anterior se obtiene con una búsqueda binaria
+        all_dates, ranks = np.unique(np.concatenate([event_dates, query_dates]), return_inverse=True)
+        stride = len(all_dates) + 1
+        event_keys = codes * stride + ranks[:len(event_dates)]
+        order = np.argsort(event_keys, kind='stable')
+        event_keys, event_ratings, event_codes = event_keys[order], events['rating'].to_numpy()[order], codes[order]
+
+        result = {}
+        for role, column in (('local', 'equipo_local'), ('visitante', 'equipo_visitante')):
+            team_codes = pd.Categorical(df[column], categories=self.teams).codes.astype(np.int64)
+            keys = team_codes * stride + ranks[len(event_dates):]
+            position = np.searchsorted(event_keys, keys, side='left') - 1
+            found = (team_codes >= 0) & (position >= 0)
+            found &= event_codes[np.maximum(position, 0)] == team_codes
+            result[f'elo_{role}'] = np.where(found, event_ratings[np.maximum(position, 0)], self.initial_rating)
+
+        features = pd.DataFrame(result, index=df.index)
+        features['elo_diferencia'] = features['elo_local'] - features['elo_visitante']
+        return features
+
+    def events(self) -> pd.DataFrame:
+        """
+        Historial de eventos: fecha, temporada, equipo, rating y partidos tras cada fecha jugada.
+        """
+        if self._events_frame is None:
+            sizes = [len(played) for _, _, played, _, _ in self._events]
+            self._events_frame = pd.DataFrame({
+                'fecha': np.repeat(np.array([date for date, *_ in self._events], dtype='datetime64[ns]'), sizes),
+                'temporada': np.repeat(np.array([season for _, season, *_ in self._events], dtype=object), sizes),
+                'equipo': pd.Categorical.from_codes(
+                    np.concatenate([played for _, _, played, _, _ in self._events] or [np.empty(0, dtype=np.int64)]),
+                    categories=pd.Index(self.teams, dtype=object)
+                ),
+                'rating': np.concatenate([ratings for *_, ratings, _ in self._events] or [np.empty(0)]),
+                'partidos': np.concatenate([partidos for *_, partidos in self._events] or [np.empty(0, dtype=np.int64)])
+            })
+        return self._events_frame
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Estado persistible: el historial de eventos con el hash de la temporada de cada uno.
+        """
+        events = self.events().copy()
+        events['hash'] = events['temporada'].map(lambda season: self.seasons.get(str(season).replace("-", "_")))
+        return events
+
+    @classmethod
+    def from_frame(cls, events: pd.DataFrame, **params) -> "EloRatings":
+        """
+        Reconstruye el estado desde to_frame, sin volver a procesar los partidos.
+        """
+        elo = cls(**params)
+        teams = events['equipo'].astype(object)
+        elo._team_codes(pd.unique(teams))
+        last = events.groupby(teams, sort=False)[['rating', 'partidos']].last()
+        codes = np.array([elo._codes[team] for team in last.index], dtype=np.int64)
+        elo.ratings[codes] = last['rating'].to_numpy()
+        elo.partidos[codes] = last['partidos'].to_numpy()
+
+        for (date, season), group in events.groupby(['fecha', 'temporada'], sort=True):
+            codes = np.array([elo._codes[team] for team in group['equipo'].astype(object)], dtype=np.int64)
+            elo._events.append((date.to_datetime64(), season, codes,
+                                group['rating'].to_numpy(), group['partidos'].to_numpy()))
+        if len(events):
+            elo.last_date = events['fecha'].max().to_datetime64()
+        elo.seasons = {str(season).replace("-", "_"): content_hash
+                       for season, content_hash in events[['temporada', 'hash']].drop_duplicates().itertuples(index=False)}
+        return elo
+
+    def _team_codes(self, names) -> np.ndarray:
+        """
+        Códigos de equipo de un array de nombres; los equipos nuevos se agregan al estado.
+        """
+        new = [name for name in pd.unique(np.asarray(names, dtype=object)) if name not in self._codes]
+        if new:
+            for name in new:
+                self._codes[name] = len(self.teams)
+                self.teams.append(name)
+            self.ratings = np.r_[self.ratings, np.full(len(new), self.initial_rating)]
+            self.partidos = np.r_[self.partidos, np.zeros(len(new), dtype=np.int64)]
+        return np.array([self._codes[name] for name in names], dtype=np.int64)
+
+
+def _goal_margin(diferencia: np.ndarray) -> np.ndarray:
+    """
+    Factor por diferencia de goles (como el World Football Elo): 1, 1.5 o (11 + dif) / 8.
+    """
+    margen = np.abs(diferencia)
+    return np.where(margen <= 1, 1.0, np.where(margen == 2, 1.5, (11.0 + margen) / 8.0))
+
+
+def get_elo_ratings() -> EloRatings:
+    """
+    Ratings Elo del dataset, calculados una vez por versión del dataset.
+
+    Se guardan en la caché en disco; cuando llegan temporadas nuevas se parte
+    del estado guardado de la versión anterior y solo se procesan sus
+    partidos. Si una temporada ya procesada cambió o se eliminó, o la nueva
+    tiene partidos anteriores al último procesado, se recalcula desde cero.
+    """
+    return _cached_elo(get_dataset_version())
+
+
+def get_rating_features() -> pd.DataFrame:
+    """
+    Ratings previos a cada partido de load_champions_data("all") (elo_local, elo_visitante, elo_diferencia).
+    """
+    return _cached_rating_features(get_dataset_version())
+
+
+@st.cache_resource(max_entries=2)
+def _cached_elo(version: str) -> EloRatings:
+    state = get_dataset_state()
+    views = state.season_views()
+    hashes = {name: state.hashes[name] for name in views}
+
+    key, events = latest_cached_frame("elo")
+    if key == version:
+        return EloRatings.from_frame(events)
+
+    elo = EloRatings.from_frame(events) if events is not None else None
+    if elo is not None and all(hashes.get(season) == content_hash for season, content_hash in elo.seasons.items()):
+        new_seasons = [name for name in views if name not in elo.seasons]
+        try:
+            if new_seasons:
+                elo.update(pd.concat([views[name] for name in new_seasons], ignore_index=True), hashes)
+        except ValueError:
+            elo = None
+    else:
+        elo = None
+
+    if elo is None:
+        elo = EloRatings()
+        elo.update(load_champions_data("all"), hashes)
+    write_cached_frame("elo", version, elo.to_frame())
+    return elo
+
+
+@st.cache_resource(max_entries=2)
+def _cached_rating_features(version: str) -> pd.DataFrame:
+    return get_elo_ratings().pre_match_ratings(load_champions_data("all"))
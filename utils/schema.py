@@ -0,0 +1,204 @@
+"""
+Módulo de esquema de tipos para los datos de partidos (basado en diccionario_datos.json)
+"""
+import json
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.data_store import file_hash
+
+SCHEMA_FILE = Path("static/datasets/diccionario_datos.json")
+MATCH_SCHEMA_KEY = "champions_YYYY_YYYY.csv"
+DERIVED_SCHEMA_KEY = "champions_variables_derivadas"
+
+
+@lru_cache(maxsize=1)
+def load_schema() -> dict:
+    """
+    Lee el diccionario de datos con los tipos de las columnas de partidos.
+
+    Returns:
+        dict con las entradas de columnas originales y derivadas
+    """
+    with open(SCHEMA_FILE, encoding="utf-8") as f:
+        diccionario = json.load(f)
+    return {
+        "columnas": diccionario[MATCH_SCHEMA_KEY],
+        "derivadas": diccionario[DERIVED_SCHEMA_KEY]
+    }
+
+
+@lru_cache(maxsize=1)
+def schema_version() -> str:
+    """
+    Hash del diccionario de datos, para invalidar cachés cuando cambia el esquema.
+    """
+    return file_hash(SCHEMA_FILE)
+
+
+def get_categories(column: str) -> list:
+    """
+    Retorna el orden de categorías definido en el esquema para una columna.
+
+    Args:
+        column: Nombre de la columna (ej: "fase", "resultado")
+
+    Returns:
+        Lista de categorías en su orden lógico
+    """
+    schema = load_schema()
+    spec = schema["columnas"].get(column) or schema["derivadas"][column]
+    return spec["categorias"]
+
+
+def get_dtype(column: str) -> str:
+    """
+    Retorna el tipo declarado en el esquema para una columna.
+
+    Args:
+        column: Nombre de la columna (ej: "goles_local", "total_goles")
+
+    Returns:
+        Nombre del tipo (ej: "int16")
+    """
+    schema = load_schema()
+    spec = schema["columnas"].get(column) or schema["derivadas"][column]
+    return spec["tipo"]
+
+
+def read_raw_match_csv(file_path: Path, chunksize: int | None = None):
+    """
+    Lee un CSV de partidos sin interpretar tipos: todas las columnas como category.
+
+    La lectura nunca falla por valores mal formados; cada columna queda como
+    un diccionario de textos distintos más códigos enteros, sobre los que se
+    valida (utils.validation) y se convierte (apply_schema) en tiempo
+    proporcional al número de valores distintos.
+
+    Args:
+        file_path: Ruta del archivo CSV
+        chunksize: Filas por bloque, o None para leer el archivo completo
+
+    Returns:
+        DataFrame (o lector por bloques si se indica chunksize)
+    """
+    return pd.read_csv(file_path, dtype="category", chunksize=chunksize)
+
+
+def apply_schema(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte un DataFrame de read_raw_match_csv a los tipos del esquema.
+
+    Fechas y goles se convierten sobre las categorías y se expanden con los
+    códigos; los valores que no se pueden convertir quedan como nulos.
+    """
+    columns = load_schema()["columnas"]
+    df = raw.copy(deep=False)
+    for col, spec in columns.items():
+        if col not in df.columns:
+            continue
+        categories = df[col].cat.categories
+        codes = df[col].cat.codes.to_numpy()
+        # El código -1 (nulo) toma el valor nulo añadido al final del diccionario
+        if spec["tipo"].startswith("datetime"):
+            values = pd.to_datetime(categories, format=spec["formato"], errors="coerce").to_numpy(dtype="datetime64[ns]")
+            df[col] = np.append(values, np.datetime64("NaT", "ns"))[codes]
+        elif spec["tipo"].startswith("int"):
+            values = pd.to_numeric(categories, errors="coerce").to_numpy(dtype=np.float64)
+            column = np.append(values, np.nan)[codes]
+            # Los enteros de numpy no admiten nulos: se usa float32 para poder imputarlos
+            df[col] = column.astype("float32" if np.isnan(column).any() else spec["tipo"])
+
+    return unify_categories([df])[0]
+
+
+def unify_categories(frames: list) -> list:
+    """
+    Hace que todas las columnas de un mismo dominio compartan diccionario.
+
+    Por ejemplo, equipo_local y equipo_visitante de todas las temporadas usan
+    las mismas categorías de equipos, así los códigos son comparables y la
+    concatenación conserva el tipo category.
+
+    Args:
+        frames: Lista de DataFrames con columnas categóricas
+
+    Returns:
+        Lista de DataFrames con las categorías unificadas
+    """
+    columns = load_schema()["columnas"]
+    domains = {}
+    for col, spec in columns.items():
+        if spec["tipo"] == "category":
+            domains.setdefault(spec.get("dominio", col), []).append(col)
+
+    frames = [df.copy(deep=False) for df in frames]
+    for domain_columns in domains.values():
+        present = [(df, col) for df in frames for col in domain_columns if col in df.columns]
+        if not present:
+            continue
+        values = [df[col].cat.categories if isinstance(df[col].dtype, pd.CategoricalDtype)
+                  else pd.Index(df[col].dropna().unique()) for df, col in present]
+        observed = values[0].append(values[1:]).unique()
+        dtype = _domain_dtype([columns[col] for col in domain_columns], observed)
+        for df, col in present:
+            if df[col].dtype != dtype:
+                df[col] = df[col].astype(dtype)
+    return frames
+
+
+def _domain_dtype(specs: list, observed: pd.Index) -> pd.CategoricalDtype:
+    """
+    Tipo category de un dominio: las categorías declaradas en el esquema, en su
+    orden y con su indicador 'ordenada'; sin declaración, los valores observados
+    en orden alfabético.
+
+    Los valores observados que el esquema no declara se añaden al final (en
+    orden alfabético) para no convertirlos en nulos.
+    """
+    declared = next((spec["categorias"] for spec in specs if "categorias" in spec), None)
+    if declared is None:
+        return pd.CategoricalDtype(observed.sort_values())
+    extra = observed.difference(pd.Index(declared), sort=False).sort_values()
+    ordered = any(spec.get("ordenada", False) for spec in specs)
+    return pd.CategoricalDtype(pd.Index(declared).append(extra), ordered=ordered)
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compara la memoria de cada columna con la que ocuparía con los tipos por defecto.
+
+    Los tipos por defecto son los que infiere pd.read_csv (object para textos
+    y fechas, int64/float64 para números). La estimación se hace con los
+    códigos de cada categoría, sin materializar las columnas como texto.
+
+    Args:
+        df: DataFrame con tipos compactos
+
+    Returns:
+        DataFrame con tipo actual y memoria (KB) antes y después por columna
+    """
+    rows = []
+    for col in df.columns:
+        series = df[col]
+        after = series.memory_usage(deep=True, index=False)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            sizes = np.array([sys.getsizeof(value) for value in series.cat.categories] + [sys.getsizeof(np.nan)])
+            before = 8 * len(series) + int(sizes[series.cat.codes.to_numpy()].sum())
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            before = len(series) * (8 + sys.getsizeof("YYYY-MM-DD"))
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            before = 8 * len(series)
+        else:
+            before = after
+        rows.append({
+            "Columna": col,
+            "Tipo": str(series.dtype),
+            "Memoria antes (KB)": round(before / 1024, 2),
+            "Memoria después (KB)": round(after / 1024, 2)
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,262 @@
+"""
+Módulo de probabilidades de marcador (modelo de Poisson con corrección Dixon-Coles)
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import get_dataset_version, load_champions_data
+from utils.schema import get_categories
+
+# Goles máximos por equipo en la matriz de marcadores (0..MAX_GOALS)
+MAX_GOALS = 10
+
+# Valores de rho que se evalúan al ajustar la corrección Dixon-Coles
+RHO_GRID = np.round(np.arange(-0.25, 0.2501, 0.005), 3)
+
+# Partidos con marcador bajo por bloque al evaluar la rejilla de rho
+RHO_BLOCK_ROWS = 65_536
+
+
+class ScorelineModel:
+    """
+    Modelo de goles de Poisson con ataque, defensa y localía (Dixon-Coles).
+
+    Los goles esperados de un partido son
+        local:     exp(media + localía + ataque[local] - defensa[visitante])
+        visitante: exp(media + ataque[visitante] - defensa[local])
+    y rho corrige la dependencia entre los marcadores bajos (0-0, 1-0, 0-1, 1-1).
+
+    El ajuste maximiza la verosimilitud de Poisson con una penalización L2
+    sobre ataque y defensa (equipos con pocos partidos quedan cerca de la
+    media). Cada iteración da un paso de Newton por bloques: el gradiente y
+    la curvatura de todos los ataques (o defensas) salen de np.bincount
+    sobre los códigos de equipo, sin bucles por partido; rho se ajusta
+    después con una rejilla evaluada para todos los partidos a la vez.
+
+    Las predicciones se hacen por lotes: score_matrix devuelve el tensor
+    partidos x goles local x goles visitante y de él se derivan 1X2,
+    más/menos goles y marcador exacto.
+    """
+
+    def __init__(self, l2: float = 1.0, max_iter: int = 500, tol: float = 1e-8, dixon_coles: bool = True):
+        self.l2 = l2
+        self.max_iter = max_iter
+        self.tol = tol
+        self.dixon_coles = dixon_coles
+        self.teams = pd.Index([])
+        self.mean = 0.0
+        self.home = 0.0
+        self.attack = np.empty(0)
+        self.defence = np.empty(0)
+        self.rho = 0.0
+        self.n_iter = 0
+
+    def fit(self, df: pd.DataFrame) -> "ScorelineModel":
+        """
+        Ajusta los parámetros con los partidos de df (se omiten los que no tienen equipos o marcador).
+
+        Args:
+            df: DataFrame con equipo_local, equipo_visitante, goles_local y goles_visitante
+
+        Returns:
+            El propio modelo ajustado
+        """
+        goles_local = df['goles_local'].to_numpy(dtype=np.float64)
+        goles_visitante = df['goles_visitante'].to_numpy(dtype=np.float64)
+        valid = (~np.isnan(goles_local) & ~np.isnan(goles_visitante)
+                 & df['equipo_local'].notna().to_numpy() & df['equipo_visitante'].notna().to_numpy())
+        if not valid.any():
+            raise ValueError("No hay partidos con marcador para ajustar el modelo de goles")
+
+        codes, teams = pd.factorize(np.concatenate([df['equipo_local'].to_numpy(dtype=object)[valid],
+                                                    df['equipo_visitante'].to_numpy(dtype=object)[valid]]), sort=True)
+        n, n_teams = int(valid.sum()), len(teams)
+        home_codes, away_codes = codes[:n], codes[n:]
+        y_home, y_away = goles_local[valid], goles_visitante[valid]
+
+        self.teams = pd.Index(teams)
+        attack, defence = np.zeros(n_teams), np.zeros(n_teams)
+        mean, home = np.log(max((y_home.mean() + y_away.mean()) / 2, 1e-3)), 0.0
+        for self.n_iter in range(1, self.max_iter + 1):
+            # Paso de Newton por bloques (media, localía, ataques, defensas), recalculando los
+            # goles esperados entre bloques; dentro de cada bloque el hessiano es diagonal
+            lambda_home = np.exp(mean + home + attack[home_codes] - defence[away_codes])
+            lambda_away = np.exp(mean + attack[away_codes] - defence[home_codes])
+            step_mean = (y_home.sum() + y_away.sum()) / (lambda_home.sum() + lambda_away.sum())
+            mean += np.log(step_mean)
+
+            lambda_home *= step_mean
+            step_home = y_home.sum() / lambda_home.sum()
+            home += np.log(step_home)
+
+            lambda_home = np.exp(mean + home + attack[home_codes] - defence[away_codes])
+            lambda_away = np.exp(mean + attack[away_codes] - defence[home_codes])
+            step_attack = ((np.bincount(home_codes, y_home - lambda_home, n_teams)
+                            + np.bincount(away_codes, y_away - lambda_away, n_teams) - self.l2 * attack)
+                           / (np.bincount(home_codes, lambda_home, n_teams)
+                              + np.bincount(away_codes, lambda_away, n_teams) + self.l2))
+            attack += step_attack
+
+            lambda_home = np.exp(mean + home + attack[home_codes] - defence[away_codes])
+            lambda_away = np.exp(mean + attack[away_codes] - defence[home_codes])
+            step_defence = (-(np.bincount(away_codes, y_home - lambda_home, n_teams)
+                              + np.bincount(home_codes, y_away - lambda_away, n_teams)) - self.l2 * defence) \
+                / (np.bincount(away_codes, lambda_home, n_teams) + np.bincount(home_codes, lambda_away, n_teams) + self.l2)
+            defence += step_defence
+
+            if max(abs(np.log(step_mean)), abs(np.log(step_home)), np.abs(step_attack).max(),
+                   np.abs(step_defence).max()) < self.tol:
+                break
+
+        self.mean, self.home, self.attack, self.defence = float(mean), float(home), attack, defence
+        self.rho = 0.0
+        if self.dixon_coles:
+            lambda_home, lambda_away = self._expected_goals(home_codes, away_codes)
+            self.rho = _fit_rho(y_home, y_away, lambda_home, lambda_away)
+        return self
+
+    def expected_goals(self, home_teams, away_teams, neutral: bool = False) -> tuple:
+        """
+        Goles esperados de local y visitante por partido (equipos desconocidos = equipo medio).
+
+        Args:
+            home_teams: Equipos locales
+            away_teams: Equipos visitantes
+            neutral: Si es True, campo neutral (sin ventaja de localía, ej: la final)
+
+        Returns:
+            Tupla (array local, array visitante)
+        """
+        return self._expected_goals(self._codes(home_teams), self._codes(away_teams), neutral)
+
+    def score_matrix(self, home_teams, away_teams, max_goals: int = MAX_GOALS, neutral: bool = False) -> np.ndarray:
+        """
+        Probabilidad de cada marcador para todos los partidos en una sola operación.
+
+        Returns:
+            Tensor partidos x (max_goals + 1) x (max_goals + 1); [i, g, h] es la
+            probabilidad de que el partido i termine g (local) - h (visitante).
+            Cada matriz se normaliza para sumar 1 (la masa por encima de
+            max_goals es despreciable).
+        """
+        lambda_home, lambda_away = self.expected_goals(home_teams, away_teams, neutral)
+        goals = np.arange(max_goals + 1)
+        log_factorial = np.r_[0.0, np.cumsum(np.log(np.arange(1, max_goals + 1)))]
+        pmf_home = np.exp(goals * np.log(lambda_home)[:, None] - lambda_home[:, None] - log_factorial)
+        pmf_away = np.exp(goals * np.log(lambda_away)[:, None] - lambda_away[:, None] - log_factorial)
+
+        matrix = pmf_home[:, :, None] * pmf_away[:, None, :]
+        matrix[:, :2, :2] *= _tau(self.rho, lambda_home, lambda_away)
+        matrix /= matrix.sum(axis=(1, 2), keepdims=True)
+        return matrix
+
+    def outcome_probabilities(self, home_teams, away_teams, over_under: float = 2.5) -> pd.DataFrame:
+        """
+        Probabilidades derivadas de la matriz de marcadores para cada partido.
+
+        Returns:
+            DataFrame con 1X2 (categorías de 'resultado'), goles esperados,
+            'más de N' / 'menos de N' goles y el marcador más probable con su probabilidad
+        """
+        matrix = self.score_matrix(home_teams, away_teams)
+        lambda_home, lambda_away = self.expected_goals(home_teams, away_teams)
+        goals = np.arange(matrix.shape[1])
+        difference = goals[:, None] - goals[None, :]
+        total = goals[:, None] + goals[None, :]
+
+        classes = get_categories('resultado')
+        flat = matrix.reshape(len(matrix), -1)
+        best = flat.argmax(axis=1)
+        return pd.DataFrame({
+            'equipo_local': np.asarray(home_teams, dtype=object),
+            'equipo_visitante': np.asarray(away_teams, dtype=object),
+            'goles_esperados_local': lambda_home,
+            'goles_esperados_visitante': lambda_away,
+            classes[0]: matrix[:, difference > 0].sum(axis=1),
+            classes[1]: matrix[:, difference == 0].sum(axis=1),
+            classes[2]: matrix[:, difference < 0].sum(axis=1),
+            f'más de {over_under}': matrix[:, total > over_under].sum(axis=1),
+            f'menos de {over_under}': matrix[:, total < over_under].sum(axis=1),
+            'marcador_probable': [f'{g}-{h}' for g, h in zip(*np.divmod(best, matrix.shape[2]))],
+            'prob_marcador': flat[np.arange(len(flat)), best],
+        })
+
+    def parameters(self) -> pd.DataFrame:
+        """
+        Ataque y defensa por equipo (log-escala; 0 = equipo medio), ordenados por fuerza.
+        """
+        params = pd.DataFrame({'ataque': self.attack, 'defensa': self.defence}, index=self.teams)
+        params['fuerza'] = params['ataque'] + params['defensa']
+        return params.sort_values('fuerza', ascending=False)
+
+    def _codes(self, teams) -> np.ndarray:
+        return pd.Categorical(np.asarray(teams, dtype=object), categories=self.teams).codes.astype(np.int64)
+
+    def _expected_goals(self, home_codes: np.ndarray, away_codes: np.ndarray, neutral: bool = False) -> tuple:
+        # El código -1 (equipo desconocido) apunta al último elemento, que vale 0
+        attack, defence = np.r_[self.attack, 0.0], np.r_[self.defence, 0.0]
+        home = 0.0 if neutral else self.home
+        lambda_home = np.exp(self.mean + home + attack[home_codes] - defence[away_codes])
+        lambda_away = np.exp(self.mean + attack[away_codes] - defence[home_codes])
+        return lambda_home, lambda_away
+
+
+def _tau(rho, lambda_home: np.ndarray, lambda_away: np.ndarray) -> np.ndarray:
+    """
+    Factor Dixon-Coles de los marcadores 0-0, 0-1, 1-0 y 1-1 (partidos x 2 x 2).
+
+    rho puede ser un escalar o un array (se añade como primera dimensión).
+    """
+    rho = np.asarray(rho, dtype=np.float64)[..., None]
+    tau = np.empty(rho.shape[:-1] + (len(lambda_home), 2, 2))
+    tau[..., 0, 0] = 1 - lambda_home * lambda_away * rho
+    tau[..., 0, 1] = 1 + lambda_home * rho
+    tau[..., 1, 0] = 1 + lambda_away * rho
+    tau[..., 1, 1] = 1 - rho
+    return tau
+
+
+def _fit_rho(y_home: np.ndarray, y_away: np.ndarray, lambda_home: np.ndarray, lambda_away: np.ndarray) -> float:
+    """
+    rho de RHO_GRID que maximiza la verosimilitud con los goles esperados ya ajustados.
+
+    Solo los marcadores bajos dependen de rho: la verosimilitud de toda la
+    rejilla es una matriz rejilla x partidos con marcador bajo; la validez de
+    cada rho se decide con los goles esperados extremos, sin recorrer la
+    rejilla por partido.
+    """
+    low = (y_home <= 1) & (y_away <= 1)
+    if not low.any():
+        return 0.0
+    # Cada factor de un marcador bajo es 1 + c * rho: c = -λl·λv (0-0), λl (0-1), λv (1-0) o -1 (1-1)
+    g, h = y_home[low], y_away[low]
+    slope = np.select(
+        [(g == 0) & (h == 0), g == 0, h == 0],
+        [-lambda_home[low] * lambda_away[low], lambda_home[low], lambda_away[low]],
+        default=-1.0
+    )
+
+    # Valores de rho con algún factor no positivo en cualquier partido no son válidos; basta
+    # con los extremos: 0-0 exige rho < 1 / max(λl·λv) y 0-1 / 1-0, rho > -1 / max(λl) y -1 / max(λv)
+    valid = ((RHO_GRID * np.max(lambda_home * lambda_away) < 1) & (RHO_GRID < 1)
+             & (RHO_GRID * np.max(lambda_home) > -1) & (RHO_GRID * np.max(lambda_away) > -1))
+
+    # Matriz rejilla x partidos por bloques de filas, para acotar la memoria
+    log_likelihood = np.zeros(len(RHO_GRID))
+    for start in range(0, len(slope), RHO_BLOCK_ROWS):
+        factors = 1 + RHO_GRID[:, None] * slope[None, start:start + RHO_BLOCK_ROWS]
+        log_likelihood += np.log(np.where(factors > 0, factors, 1.0)).sum(axis=1)
+    return float(RHO_GRID[np.argmax(np.where(valid, log_likelihood, -np.inf))])
+
+
+def get_scoreline_model() -> ScorelineModel:
+    """
+    Modelo de goles ajustado con load_champions_data("all"), una vez por versión del dataset.
+    """
+    return _cached_scoreline_model(get_dataset_version())
+
+
+@st.cache_resource(max_entries=2)
+def _cached_scoreline_model(version: str) -> ScorelineModel:
+    return ScorelineModel().fit(load_champions_data("all"))
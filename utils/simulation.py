@@ -0,0 +1,189 @@
+"""
+Módulo de simulación Monte Carlo de las eliminatorias (Octavos -> Final)
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import DEFAULT_MAX_WORKERS, get_dataset_version
+from utils.scoreline import ScorelineModel, get_scoreline_model
+
+# Rondas de eliminación directa, en el orden de 'fase' del esquema (el de phase_order)
+KNOCKOUT_ROUNDS = ('Octavos', 'Cuartos', 'Semifinal', 'Final')
+
+# Simulaciones por defecto y tamaño de cada lote (un lote = una tarea del pool de procesos)
+DEFAULT_SIMULATIONS = 200_000
+CHUNK_SIZE = 100_000
+
+# Cuantil normal del intervalo de confianza del 95%
+Z_95 = 1.959964
+
+
+class KnockoutSimulator:
+    """
+    Simulador Monte Carlo de un cuadro de eliminación directa.
+
+    Las simulaciones se representan como arrays: una fila por simulación y
+    una columna por equipo aún en el cuadro. En cada ronda se emparejan las
+    columnas contiguas, se sortea el ganador de todas las eliminatorias de
+    todas las simulaciones con un único array de uniformes y la matriz de
+    probabilidades de pasar (advance[i, j]) y se conservan los ganadores;
+    con sorteo abierto, las filas se barajan antes de cada ronda.
+
+    Las simulaciones se reparten en lotes con flujos aleatorios
+    independientes (SeedSequence.spawn) que se ejecutan en un pool de
+    procesos: el resultado depende solo de la semilla y del número de
+    simulaciones, no del número de procesos.
+    """
+
+    def __init__(self, teams, advance: np.ndarray, final: np.ndarray):
+        """
+        Args:
+            teams: Equipos del cuadro (potencia de 2, como mucho 2 ** len(KNOCKOUT_ROUNDS))
+            advance: Probabilidad de que i elimine a j en ida y vuelta (i local en la ida)
+            final: Probabilidad de que i gane a j en la final (campo neutral)
+        """
+        self.teams = pd.Index(teams)
+        n_rounds = int(np.log2(len(self.teams))) if len(self.teams) > 1 else 0
+        if 2 ** n_rounds != len(self.teams) or not 1 <= n_rounds <= len(KNOCKOUT_ROUNDS):
+            raise ValueError(
+                f"El cuadro debe tener 2, 4, 8 o 16 equipos (tiene {len(self.teams)})"
+            )
+        self.rounds = KNOCKOUT_ROUNDS[-n_rounds:]
+        self.advance = np.asarray(advance, dtype=np.float64)
+        self.final = np.asarray(final, dtype=np.float64)
+
+    @classmethod
+    def from_scoreline(cls, model: ScorelineModel, teams) -> "KnockoutSimulator":
+        """
+        Simulador con las probabilidades exactas del modelo de marcadores.
+
+        Las eliminatorias a ida y vuelta se deciden por la suma de las dos
+        diferencias de goles (convolución de sus distribuciones); la final es
+        un partido en campo neutral. Un empate (prórroga y penaltis) se
+        reparte al 50%.
+        """
+        teams = pd.Index(teams)
+        n = len(teams)
+        home, away = np.repeat(teams.to_numpy(), n), np.tile(teams.to_numpy(), n)
+
+        # Diferencia de goles de i en la ida (i local) y en la vuelta (j local), para cada par i, j
+        first_leg = _difference_distribution(model.score_matrix(home, away)).reshape(n, n, -1)
+        second_leg = first_leg.transpose(1, 0, 2)[:, :, ::-1]
+        aggregate = _sum_distribution(first_leg, second_leg)
+        final = _difference_distribution(model.score_matrix(home, away, neutral=True)).reshape(n, n, -1)
+        return cls(teams, _win_probability(aggregate), _win_probability(final))
+
+    def run(self, n_simulations: int = DEFAULT_SIMULATIONS, seed: int = 0, open_draw: bool = True,
+            max_workers: int | None = None) -> pd.DataFrame:
+        """
+        Simula el torneo n_simulations veces.
+
+        Args:
+            n_simulations: Número de torneos simulados
+            seed: Semilla (mismo resultado con cualquier número de procesos)
+            open_draw: Si es True, sorteo abierto antes de cada ronda; si no,
+                cuadro fijo en el orden de teams (1º-2º, 3º-4º, ...)
+            max_workers: Procesos del pool (por defecto DEFAULT_MAX_WORKERS, 1 = sin pool)
+
+        Returns:
+            DataFrame con equipo, fase (rondas tras la primera y "Campeón"),
+            probabilidad de alcanzarla e intervalo de confianza del 95% (Wilson)
+        """
+        if n_simulations < 1:
+            raise ValueError("El número de simulaciones debe ser positivo")
+        sizes = [CHUNK_SIZE] * (n_simulations // CHUNK_SIZE)
+        if n_simulations % CHUNK_SIZE:
+            sizes.append(n_simulations % CHUNK_SIZE)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        args = [(self.advance, self.final, size, chunk_seed, open_draw) for size, chunk_seed in zip(sizes, seeds)]
+
+        workers = min(max_workers or DEFAULT_MAX_WORKERS, len(sizes))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                counts = sum(pool.map(_simulate_chunk, *zip(*args)))
+        else:
+            counts = sum(_simulate_chunk(*chunk_args) for chunk_args in args)
+
+        stages = list(self.rounds[1:]) + ['Campeón']
+        probability = counts / n_simulations
+        lower, upper = _wilson_interval(probability, n_simulations)
+        return pd.DataFrame({
+            'equipo': np.tile(self.teams.to_numpy(), len(stages)),
+            'fase': pd.Categorical(np.repeat(stages, len(self.teams)), categories=stages, ordered=True),
+            'probabilidad': probability.ravel(),
+            'ic_inferior': lower.ravel(),
+            'ic_superior': upper.ravel(),
+        })
+
+
+def _simulate_chunk(advance: np.ndarray, final: np.ndarray, n: int, seed, open_draw: bool) -> np.ndarray:
+    """
+    Simula n torneos; retorna las veces que cada equipo supera cada ronda (rondas x equipos).
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = len(advance)
+    n_rounds = int(np.log2(n_teams))
+    bracket = np.broadcast_to(np.arange(n_teams, dtype=np.int16), (n, n_teams))
+    counts = np.zeros((n_rounds, n_teams), dtype=np.int64)
+    for r in range(n_rounds):
+        if open_draw:
+            bracket = rng.permuted(bracket, axis=1)
+        home, away = bracket[:, 0::2], bracket[:, 1::2]
+        probability = (final if r == n_rounds - 1 else advance)[home, away]
+        bracket = np.where(rng.random(probability.shape) < probability, home, away)
+        counts[r] = np.bincount(bracket.ravel(), minlength=n_teams)
+    return counts
+
+
+def _difference_distribution(matrix: np.ndarray) -> np.ndarray:
+    """
+    Distribución de goles local - visitante (partidos x 2G+1, la posición G es el empate).
+    """
+    goals = matrix.shape[1]
+    difference = (np.arange(goals)[:, None] - np.arange(goals)[None, :] + goals - 1).ravel()
+    return matrix.reshape(len(matrix), -1) @ np.eye(2 * goals - 1)[difference]
+
+
+def _sum_distribution(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """
+    Distribución de la suma de dos diferencias independientes (convolución por par de equipos).
+    """
+    size = first.shape[-1]
+    total = (np.arange(size)[:, None] + np.arange(size)[None, :]).ravel()
+    outer = first[..., :, None] * second[..., None, :]
+    return outer.reshape(*first.shape[:-1], -1) @ np.eye(2 * size - 1)[total]
+
+
+def _win_probability(distribution: np.ndarray) -> np.ndarray:
+    # Diferencia positiva + mitad del empate (prórroga y penaltis)
+    center = distribution.shape[-1] // 2
+    return distribution[..., center + 1:].sum(axis=-1) + 0.5 * distribution[..., center]
+
+
+def _wilson_interval(probability: np.ndarray, n: int) -> tuple:
+    """
+    Intervalo de Wilson del 95% para proporciones estimadas con n simulaciones.
+    """
+    z2 = Z_95 ** 2
+    center = (probability + z2 / (2 * n)) / (1 + z2 / n)
+    half_width = Z_95 * np.sqrt(probability * (1 - probability) / n + z2 / (4 * n ** 2)) / (1 + z2 / n)
+    return center - half_width, center + half_width
+
+
+def get_knockout_probabilities(n_teams: int = 16, n_simulations: int = DEFAULT_SIMULATIONS, seed: int = 0) -> pd.DataFrame:
+    """
+    Probabilidades de avanzar de los n_teams equipos más fuertes según el modelo de marcadores.
+
+    Se calcula una vez por versión del dataset (y parámetros de la simulación).
+    """
+    return _cached_knockout(get_dataset_version(), n_teams, n_simulations, seed)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _cached_knockout(version: str, n_teams: int, n_simulations: int, seed: int) -> pd.DataFrame:
+    model = get_scoreline_model()
+    simulator = KnockoutSimulator.from_scoreline(model, model.parameters().index[:n_teams])
+    return simulator.run(n_simulations, seed=seed)
@@ -0,0 +1,94 @@
+"""
+Módulo de validación de esquema y calidad de los CSV de partidos (basado en diccionario_datos.json)
+"""
+import numpy as np
+import pandas as pd
+
+from utils.schema import load_schema
+
+# Estados posibles del veredicto de un archivo
+VALID = "válido"
+WITH_WARNINGS = "con avisos"
+INVALID = "inválido"
+
+
+def validate_matches(raw: pd.DataFrame, season: str | None = None) -> dict:
+    """
+    Valida un DataFrame de partidos leído con read_raw_match_csv.
+
+    Comprueba el conjunto de columnas, que fechas y goles se puedan convertir
+    a su tipo, que los goles sean enteros no negativos dentro del rango de
+    su tipo, que 'fase' tenga valores permitidos y que las fechas caigan en
+    los años de la temporada.
+    Las comprobaciones se hacen sobre el diccionario de valores distintos de
+    cada columna y se cuentan las filas afectadas con sus códigos, sin
+    recorrer los textos fila a fila.
+
+    Los errores impiden cargar el archivo; los avisos (nulos, columnas extra,
+    fechas fuera de temporada) solo se informan.
+
+    Args:
+        raw: DataFrame con todas las columnas como category
+        season: Temporada del archivo (ej: "2013_2014") para validar el rango de fechas
+
+    Returns:
+        dict con 'estado', 'filas', 'errores' y 'avisos'
+    """
+    columns = load_schema()["columnas"]
+    errores, avisos = [], []
+
+    faltantes = [col for col in columns if col not in raw.columns]
+    if faltantes:
+        errores.append(f"Columnas faltantes: {', '.join(faltantes)}")
+    sobrantes = [col for col in raw.columns if col not in columns]
+    if sobrantes:
+        avisos.append(f"Columnas no definidas en el esquema: {', '.join(sobrantes)}")
+
+    for col, spec in columns.items():
+        if col not in raw.columns:
+            continue
+        categories = raw[col].cat.categories
+        codes = raw[col].cat.codes.to_numpy()
+        # Filas por valor distinto del diccionario
+        rows_per_value = np.bincount(codes[codes >= 0], minlength=len(categories))
+
+        nulos = len(codes) - int(rows_per_value.sum())
+        if nulos:
+            avisos.append(f"{col}: {nulos} valores faltantes")
+
+        if spec["tipo"].startswith("datetime"):
+            fechas = pd.to_datetime(categories, format=spec["formato"], errors="coerce")
+            _check(errores, col, fechas.isna(), rows_per_value, categories,
+                   f"fechas que no cumplen el formato {spec['formato']}")
+            if season is not None:
+                inicio, fin = (int(year) for year in season.split("_"))
+                fuera = (fechas.year < inicio) | (fechas.year > fin)
+                _check(avisos, col, np.asarray(fuera), rows_per_value, categories,
+                       f"fechas fuera de los años de la temporada {inicio}-{fin}")
+        elif spec["tipo"].startswith("int"):
+            numeros = pd.to_numeric(categories, errors="coerce").to_numpy(dtype=np.float64)
+            with np.errstate(invalid="ignore"):
+                invalidos = np.isnan(numeros) | (numeros < 0) | (numeros != np.round(numeros))
+                # apply_schema convierte al tipo declarado, que desbordaría sin aviso
+                fuera_de_rango = ~invalidos & (numeros > np.iinfo(spec["tipo"]).max)
+            _check(errores, col, invalidos, rows_per_value, categories, "valores que no son enteros no negativos")
+            _check(errores, col, fuera_de_rango, rows_per_value, categories,
+                   f"valores mayores que el máximo de {spec['tipo']} ({np.iinfo(spec['tipo']).max})")
+        elif "categorias" in spec:
+            _check(errores, col, ~categories.isin(spec["categorias"]), rows_per_value, categories,
+                   f"valores fuera de los permitidos ({', '.join(spec['categorias'])})")
+
+    estado = INVALID if errores else WITH_WARNINGS if avisos else VALID
+    return {"estado": estado, "filas": len(raw), "errores": errores, "avisos": avisos}
+
+
+def _check(messages: list, column: str, invalid_values, rows_per_value: np.ndarray,
+           categories: pd.Index, description: str) -> None:
+    """
+    Agrega un mensaje si algún valor distinto es inválido, con el número de filas afectadas y ejemplos.
+    """
+    invalid_values = np.asarray(invalid_values, dtype=bool)
+    filas = int(rows_per_value[invalid_values].sum())
+    if filas:
+        ejemplos = ", ".join(f"'{value}'" for value in categories[invalid_values][:3])
+        messages.append(f"{column}: {filas} filas con {description} (ej: {ejemplos})")
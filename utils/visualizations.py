@@ -1,11 +1,15 @@
 """
 Módulo para crear visualizaciones interactivas con Plotly
 """
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 
+from utils.aggregates import RESULT_COLUMNS, is_rollup
+from utils.partials import CORRELATION_COLUMNS, MatchSummary
+
 # Tema de colores consistente
 COLORS = {
     'primary': '#1f77b4',
@@ -21,13 +25,22 @@ COLORS = {
 TEMPLATE = 'plotly_white'
 
 
-def create_goals_distribution(df: pd.DataFrame) -> go.Figure:
+def create_goals_distribution(df: pd.DataFrame | MatchSummary) -> go.Figure:
     """
     Crea histograma de distribución de goles totales
+    
+    Acepta partidos procesados o un resumen combinado (get_dataset_summary),
+    cuyo histograma ya viene contado por valor de goles.
     """
+    histogram_args = {}
+    if isinstance(df, MatchSummary):
+        df = df.goals_histogram()
+        histogram_args = {'y': 'partidos', 'histfunc': 'sum'}
+    
     fig = px.histogram(
         df,
         x='total_goles',
+        **histogram_args,
         nbins=15,
         title='Distribución de Goles Totales por Partido',
         labels={'total_goles': 'Goles Totales', 'count': 'Frecuencia'},
@@ -38,7 +51,8 @@ def create_goals_distribution(df: pd.DataFrame) -> go.Figure:
     fig.update_layout(
         showlegend=False,
         hovermode='x unified',
-        height=400
+        height=400,
+        yaxis_title='Frecuencia'
     )
     
     return fig
@@ -47,8 +61,10 @@ def create_goals_distribution(df: pd.DataFrame) -> go.Figure:
 def create_goals_by_phase(df: pd.DataFrame) -> go.Figure:
     """
     Crea gráfico de barras de goles por fase del torneo
+    
+    Acepta partidos procesados o un corte del agregado por partido (get_match_rollup).
     """
-    phase_stats = df.groupby('fase').agg({
+    phase_stats = df.groupby('fase', observed=False).agg({
         'goles_local': 'sum',
         'goles_visitante': 'sum'
     }).reset_index()
@@ -117,14 +133,23 @@ def create_top_teams_chart(stats_df: pd.DataFrame, top_n: int = 10) -> go.Figure
 def create_temporal_evolution(df: pd.DataFrame) -> go.Figure:
     """
     Crea gráfico de líneas de evolución temporal de goles
-    """
-    monthly_goals = df.groupby(df['fecha'].dt.to_period('M')).agg({
-        'total_goles': 'sum',
-        'goles_local': 'sum',
-        'goles_visitante': 'sum'
-    }).reset_index()
     
-    monthly_goals['fecha'] = monthly_goals['fecha'].dt.to_timestamp()
+    Acepta partidos procesados o un corte del agregado por partido (get_match_rollup).
+    """
+    if is_rollup(df):
+        monthly_goals = df.groupby('mes').agg({
+            'total_goles': 'sum',
+            'goles_local': 'sum',
+            'goles_visitante': 'sum'
+        }).reset_index().rename(columns={'mes': 'fecha'})
+    else:
+        monthly_goals = df.groupby(df['fecha'].dt.to_period('M')).agg({
+            'total_goles': 'sum',
+            'goles_local': 'sum',
+            'goles_visitante': 'sum'
+        }).reset_index()
+        
+        monthly_goals['fecha'] = monthly_goals['fecha'].dt.to_timestamp()
     
     fig = go.Figure()
     
@@ -174,12 +199,17 @@ def create_temporal_evolution(df: pd.DataFrame) -> go.Figure:
     return fig
 
 
-def create_correlation_heatmap(df: pd.DataFrame) -> go.Figure:
+def create_correlation_heatmap(df: pd.DataFrame | MatchSummary) -> go.Figure:
     """
     Crea mapa de calor de correlaciones
+    
+    Acepta partidos procesados o un resumen combinado (get_dataset_summary),
+    que calcula la matriz a partir de sus co-momentos.
     """
-    numeric_cols = ['goles_local', 'goles_visitante', 'total_goles', 'diferencia_goles']
-    corr_matrix = df[numeric_cols].corr()
+    if isinstance(df, MatchSummary):
+        corr_matrix = df.correlation()
+    else:
+        corr_matrix = df[CORRELATION_COLUMNS].corr()
     
     fig = go.Figure(data=go.Heatmap(
         z=corr_matrix.values,
@@ -206,8 +236,14 @@ def create_correlation_heatmap(df: pd.DataFrame) -> go.Figure:
 def create_result_distribution(df: pd.DataFrame) -> go.Figure:
     """
     Crea gráfico de pastel de distribución de resultados
+    
+    Acepta partidos procesados o un corte del agregado por partido (get_match_rollup).
     """
-    result_counts = df['resultado'].value_counts()
+    if is_rollup(df):
+        result_counts = df[RESULT_COLUMNS].sum()
+        result_counts = result_counts.sort_values(ascending=False, kind='stable')
+    else:
+        result_counts = df['resultado'].value_counts()
     
     fig = go.Figure(data=[go.Pie(
         labels=result_counts.index,
@@ -238,11 +274,19 @@ def create_result_distribution(df: pd.DataFrame) -> go.Figure:
 def create_goals_by_season(df: pd.DataFrame) -> go.Figure:
     """
     Crea gráfico de barras agrupadas por temporada
+    
+    Acepta partidos procesados o un corte del agregado por partido (get_match_rollup).
     """
-    season_stats = df.groupby('temporada').agg({
-        'total_goles': 'sum',
-        'equipo_local': 'count'
-    }).reset_index()
+    if is_rollup(df):
+        season_stats = df.groupby('temporada').agg({
+            'total_goles': 'sum',
+            'partidos': 'sum'
+        }).reset_index().rename(columns={'partidos': 'equipo_local'})
+    else:
+        season_stats = df.groupby('temporada').agg({
+            'total_goles': 'sum',
+            'equipo_local': 'count'
+        }).reset_index()
     
     season_stats['promedio_goles'] = (season_stats['total_goles'] / season_stats['equipo_local']).round(2)
     
@@ -287,14 +331,22 @@ def create_goals_by_season(df: pd.DataFrame) -> go.Figure:
 def create_stadium_analysis(df: pd.DataFrame, top_n: int = 10) -> go.Figure:
     """
     Crea análisis de estadios con más goles
+    
+    Acepta partidos procesados o un corte del agregado por estadio (get_stadium_rollup).
     """
-    stadium_stats = df.groupby('estadio').agg({
-        'total_goles': 'sum',
-        'equipo_local': 'count'
-    }).reset_index()
+    if is_rollup(df):
+        stadium_stats = df.groupby('estadio', observed=True).agg({
+            'total_goles': 'sum',
+            'partidos': 'sum'
+        }).reset_index().rename(columns={'partidos': 'equipo_local'})
+    else:
+        stadium_stats = df.groupby('estadio', observed=True).agg({
+            'total_goles': 'sum',
+            'equipo_local': 'count'
+        }).reset_index()
     
     stadium_stats['promedio'] = (stadium_stats['total_goles'] / stadium_stats['equipo_local']).round(2)
-    stadium_stats = stadium_stats.sort_values('total_goles', ascending=False).head(top_n)
+    stadium_stats = stadium_stats.sort_values('total_goles', ascending=False, kind='stable').head(top_n)
     
     fig = go.Figure(data=[
         go.Bar(
@@ -343,3 +395,36 @@ def create_confusion_matrix(cm, labels):
     )
     
     return fig
+
+
+def create_scoreline_heatmap(matrix: np.ndarray, local: str, visitante: str, max_goals: int = 5) -> go.Figure:
+    """
+    Crea mapa de calor con la probabilidad de cada marcador de un partido
+    
+    Args:
+        matrix: Matriz goles local x goles visitante (una fila de ScorelineModel.score_matrix)
+        local: Nombre del equipo local
+        visitante: Nombre del equipo visitante
+        max_goals: Goles máximos que se muestran por equipo
+    """
+    probabilities = np.round(matrix[:max_goals + 1, :max_goals + 1] * 100, 1)
+    goals = [str(g) for g in range(max_goals + 1)]
+    fig = go.Figure(data=go.Heatmap(
+        z=probabilities,
+        x=goals,
+        y=goals,
+        colorscale='Blues',
+        text=probabilities,
+        texttemplate='%{text}%',
+        colorbar=dict(title="Probabilidad (%)")
+    ))
+    
+    fig.update_layout(
+        title=f'Probabilidad de Marcador: {local} vs {visitante}',
+        xaxis_title=f'Goles {visitante}',
+        yaxis_title=f'Goles {local}',
+        template=TEMPLATE,
+        height=500
+    )
+    
+    return fig